@@ -0,0 +1,155 @@
+from django.conf import settings
+
+from ERP.identity_map import identity_map
+from Human_Resources.models import Staff
+from Inventory_Control.ledger import product_levels
+from Inventory_Control.models import Product, Store
+from Procurement.models import Supplier
+from Sales.models import Sales
+
+
+class BatchError(Exception):
+    pass
+
+
+def _load_stock_levels(active, ids):
+    products = active.get_many(Product, ids)
+    return product_levels(products), "Product"
+
+
+def _load_stores(active, ids):
+    return active.get_many(Store, ids), "Store"
+
+
+def _load_staff(active, ids):
+    staff = active.get_many(Staff, ids)
+    active.resolve(staff.values(), "DepartmentId")
+    return staff, "Staff"
+
+
+def _load_sales(active, ids):
+    sales = active.get_many(Sales, ids)
+    active.resolve(sales.values(), "StoreId", "StaffId")
+    return sales, "Sales"
+
+
+def _load_suppliers(active, ids):
+    return active.get_many(Supplier, ids), "Supplier"
+
+
+def _supplier_data(supplier):
+    return {
+        "SupplierId": supplier.SupplierId,
+        "SupplierName": supplier.SupplierName,
+        "ContactDetails": supplier.ContactDetails,
+        "Location": supplier.Location,
+        "ContractTerms": supplier.ContractTerms,
+    }
+
+
+# Operation name -> (argument name, loader, function turning a loaded value into the
+# result, permission needed to run it).
+# Every operation of the same loader is answered by a single load call.
+OPERATIONS = {
+    "GetStockLevel": (
+        "productId",
+        _load_stock_levels,
+        lambda level: level,
+        "Inventory_Control.view_product",
+    ),
+    "ViewStorePerformance": (
+        "storeId",
+        _load_stores,
+        lambda store: store.ViewStorePerformance(),
+        "Inventory_Control.view_store",
+    ),
+    "GetStaffData": (
+        "staffId",
+        _load_staff,
+        lambda staff: staff.GetStaffData(),
+        "Human_Resources.view_staff",
+    ),
+    "GetSalesData": (
+        "salesId",
+        _load_sales,
+        lambda sale: sale.GetSalesData(),
+        "Sales.view_sales",
+    ),
+    "GetSupplierData": (
+        "supplierId",
+        _load_suppliers,
+        _supplier_data,
+        "Procurement.view_supplier",
+    ),
+}
+
+
+def _parse(operation, user):
+    if not isinstance(operation, dict):
+        raise BatchError("Operation must be an object.")
+    name = operation.get("op")
+    if name not in OPERATIONS:
+        raise BatchError(f"Unknown operation {name!r}.")
+    if user is not None and not user.has_perm(OPERATIONS[name][3]):
+        raise BatchError(f"You do not have permission to run {name}.")
+    argument = OPERATIONS[name][0]
+    try:
+        key = int((operation.get("args") or {}).get(argument))
+    except (TypeError, ValueError):
+        raise BatchError(f"{argument} must be an integer.")
+    return name, key
+
+
+def execute_batch(operations, user=None):
+    """
+    Runs a list of read operations with DataLoader-style batching: the keys of all
+    operations are collected first, then every loader runs once for all of its keys,
+    so N stock levels cost one grouped query and N staff or sales records one IN
+    query per model, with foreign keys shared through one identity map.
+    operations: List of {"id": ..., "op": ..., "args": {...}} dictionaries.
+    user: When given, operations the user lacks the view permission for are
+          reported as errors without loading anything.
+    return: A list of {"id": ..., "result": ...} or {"id": ..., "error": ...}
+            dictionaries in the order of the operations.
+    """
+    if not isinstance(operations, list):
+        raise BatchError("operations must be a list.")
+    limit = getattr(settings, "BATCH_MAX_OPERATIONS", 100)
+    if len(operations) > limit:
+        raise BatchError(f"A batch may contain at most {limit} operations.")
+
+    # Collect the keys of every loader before loading anything.
+    parsed = []
+    keys = {}
+    for operation in operations:
+        try:
+            name, key = _parse(operation, user)
+        except BatchError as e:
+            parsed.append(e)
+            continue
+        parsed.append((name, key))
+        keys.setdefault(OPERATIONS[name][1], {})[key] = None
+
+    results = []
+    with identity_map() as active:
+        loaded = {loader: loader(active, list(ids)) for loader, ids in keys.items()}
+
+        for operation, entry in zip(operations, parsed):
+            result = {"id": operation.get("id") if isinstance(operation, dict) else None}
+            if isinstance(entry, BatchError):
+                result["error"] = str(entry)
+                results.append(result)
+                continue
+
+            name, key = entry
+            _, loader, render, _ = OPERATIONS[name]
+            values, label = loaded[loader]
+            if key not in values:
+                result["error"] = f"{label} ID {key} does not exist."
+            else:
+                try:
+                    result["result"] = render(values[key])
+                except Exception as e:
+                    result["error"] = f"An error occurred: {str(e)}"
+            results.append(result)
+    return results
@@ -1,7 +1,19 @@
-from Inventory_Control import Product
-from Procurement import Supplier, PurchaseOrder
+from Procurement.models import PurchaseOrder
 from Sales.models import Sales
+from Sales.partitions import sales_totals
 from Inventory_Control.models import Product, Store
+from Inventory_Control.rebalancing import build_plan
+from ERP.batch import execute_batch
+from ERP.profiling import traced
+from ERP.reference_cache import get_object, get_related
+from ERP.singleflight import SingleFlight
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+
+
+# Concurrent reorder triggers for the same product share one computation.
+_reorderFlight = SingleFlight()
 
 
 class Facade():
@@ -11,52 +23,87 @@ class Facade():
         self.stores = Store.objects.all()
         self.products = Product.objects.all()
 
+    @traced()
     def TriggerPurchaseOrder(self, productId):
         """
         Triggers a purchase order if the stock level of a product is below its reorder level.
+        Concurrent calls for the same product share one computation, and its result is
+        reused for REORDER_RESULT_TTL seconds.
 
         productId: The ID of the product to check.
         return: A message indicating the result of the operation.
         """
+        cacheKey = f"reorder-result:{productId}"
         try:
-            # Fetch the product
-            product = Product.objects.get(ProductId=productId)
+            cached = cache.get(cacheKey)
+            if cached is not None:
+                return cached
 
-            # Get the current stock level for the product
-            currentStock = product.GetStockLevel()
+            def reorder():
+                message = self._ReorderProduct(productId)
+                cache.set(cacheKey, message, getattr(settings, "REORDER_RESULT_TTL", 5))
+                return message
 
-            # Check if stock is below reorder level
-            if currentStock < product.ReorderLevel:
-                # Fetch all associated suppliers for the product
-                supplier = Supplier.objects.get(SupplierId=product.SupplierId.SupplierId)
+            return _reorderFlight.do(productId, reorder)
 
-                if not supplier.exists():
-                    return f"No supplier found for product ID {productId}."
-
-                # Determine the reorder quantity (e.g., reorder to full stock level)
-                reorderQuantity = product.ReorderLevel - currentStock
-                totalAmount = reorderQuantity * product.Price
+        except Product.DoesNotExist:
+            return f"Product ID {productId} does not exist."
 
-                # Create a new purchase order
-                purchaseOrder = PurchaseOrder.CreatePurchaseOrder(
-                    product=product,
-                    totalAmount=totalAmount,
-                    orderStatus="Pending",
-                    supplierId = supplier
-                )
+        except Exception as e:
+            return f"Error triggering purchase order: {str(e)}"
 
-                return f"Purchase order {purchaseOrder.PurchaseOrderId} created for product ID {productId} with quantity {reorderQuantity}."
+    def _ReorderProduct(self, productId):
+        """
+        Creates a pending purchase order for a product whose stock is below its reorder
+        level, unless one is already pending.
 
-            else:
-                return f"Stock level ({currentStock}) for product ID {productId} is sufficient. No purchase order needed."
+        productId: The ID of the product to check.
+        return: A message indicating the result of the operation.
+        """
+        # Fetch the product
+        product = get_object(Product, productId)
 
-        except Product.DoesNotExist:
+        if product is None:
             return f"Product ID {productId} does not exist."
 
-        except Exception as e:
-            return f"Error triggering purchase order: {str(e)}"
+        # Get the current stock level for the product
+        currentStock = product.GetStockLevel()
+
+        # Check if stock is below reorder level
+        if currentStock < product.ReorderLevel:
+            # Fetch all associated suppliers for the product
+            supplier = get_related(product, "SupplierId")
+
+            if supplier is None:
+                return f"No supplier found for product ID {productId}."
+
+            # Determine the reorder quantity (e.g., reorder to full stock level)
+            reorderQuantity = product.ReorderLevel - currentStock
+            totalAmount = reorderQuantity * product.Price
+
+            # Create a new purchase order; the database allows only one pending
+            # order per product, which also covers other processes and nodes
+            try:
+                with transaction.atomic():
+                    purchaseOrder = PurchaseOrder.CreatePurchaseOrder(
+                        product=product,
+                        totalAmount=totalAmount,
+                        deliveryDate=None,
+                        orderStatus="Pending",
+                    )
+            except IntegrityError:
+                pending = PurchaseOrder.objects.filter(
+                    ProductId=productId, OrderStatus="Pending"
+                ).first()
+                return f"Purchase order {pending.PurchaseOrderId if pending else ''} is already pending for product ID {productId}."
+
+            return f"Purchase order {purchaseOrder.PurchaseOrderId} created for product ID {productId} with quantity {reorderQuantity}."
+
+        else:
+            return f"Stock level ({currentStock}) for product ID {productId} is sufficient. No purchase order needed."
 
 
+    @traced()
     def ViewSalesPerformance(self, start_date=None, end_date=None):
         """
         Retrieves sales data for graphing performance by stores and products over time.
@@ -65,29 +112,49 @@ class Facade():
         :return: A dictionary with store-wise and product-wise sales performance data.
         """
         try:
-            from django.db.models import Sum
-
-            sales_queryset = self.sales
-            if start_date:
-                sales_queryset = sales_queryset.filter(DateOfSale__gte=start_date)
-            if end_date:
-                sales_queryset = sales_queryset.filter(DateOfSale__lte=end_date)
-
-            # Aggregate sales data by store
-            store_sales = (
-                sales_queryset.values("StoreId__StoreName")
-                .annotate(TotalSales=Sum("TotalAmount"))
-                .order_by("StoreId__StoreName")
+            # Aggregate sales data by store, reading only the hot/archived
+            # partitions that overlap the date range
+            store_sales = sales_totals(
+                ["StoreId__StoreName"], start_date, end_date
             )
 
             # Aggregate sales data by product
-            product_sales = (
-                sales_queryset.values("StoreId__StoreName", "ProductId__ProductName")
-                .annotate(TotalSales=Sum("TotalAmount"))
-                .order_by("ProductId__ProductName")
+            product_sales = sales_totals(
+                ["StoreId__StoreName", "ProductId__ProductName"],
+                start_date,
+                end_date,
+                order_by=["ProductId__ProductName"],
             )
 
-            return {"store_sales": list(store_sales), "product_sales": list(product_sales)}
+            return {"store_sales": store_sales, "product_sales": product_sales}
 
         except Exception as e:
             raise ValueError(f"Error generating sales performance graph: {str(e)}")
+
+    @traced()
+    def ExecuteBatch(self, operations, user=None):
+        """
+        Runs several read operations (GetStockLevel, ViewStorePerformance, GetStaffData,
+        GetSalesData, GetSupplierData) together, loading each kind of record once for
+        the whole batch.
+        :param operations: List of {"id": ..., "op": ..., "args": {...}} dictionaries.
+        :param user: Optional user whose view permissions each operation is checked against.
+        :return: A list with one result or error dictionary per operation, in order.
+        """
+        return execute_batch(operations, user)
+
+    @traced()
+    def RebalanceStock(self, coverDays=14, demandDays=30, apply=False):
+        """
+        Plans stock transfers from stores holding excess to stores running short,
+        and purchase orders for what transfers cannot cover.
+        :param coverDays: Days of demand every store should hold.
+        :param demandDays: Days of recent sales used to estimate demand.
+        :param apply: Whether to record the transfers and create the purchase orders.
+        :return: A dictionary summarising the plan and, if applied, its outcome.
+        """
+        plan = build_plan(cover_days=coverDays, demand_days=demandDays)
+        result = plan.summary()
+        if apply:
+            result["Applied"] = plan.apply()
+        return result
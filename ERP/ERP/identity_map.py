@@ -0,0 +1,218 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+import threading
+
+from django.db.models.signals import post_delete, post_save
+
+
+_current = ContextVar("identity_map", default=None)
+
+# Models whose saves and deletes are watched, and the number of open identity maps
+# across threads. Receivers are connected per model, and only while a map is open,
+# so other deletes keep Django's fast path (no per-row post_delete signals).
+_lock = threading.Lock()
+_watched = {}
+_open_maps = 0
+
+
+class IdentityMap:
+    """
+    Request-scoped map of (model, primary key) to instance.
+    Repeat primary key lookups within one request are served from memory, and
+    foreign keys across many instances can be resolved with one IN query per model.
+    """
+
+    def __init__(self):
+        self._objects = {}
+        self.hits = 0
+        self.misses = 0
+
+    def add(self, instance):
+        """
+        Registers an already loaded instance so later lookups reuse it.
+        """
+        if instance is not None and instance.pk is not None:
+            _watch(type(instance))
+            self._objects[(instance._meta.label, instance.pk)] = instance
+        return instance
+
+    def discard(self, model, pk):
+        self._objects.pop((model._meta.label, pk), None)
+
+    def get(self, model, pk):
+        """
+        Returns the instance with the given primary key, or None if it does not exist.
+        """
+        if pk is None:
+            return None
+        return self.get_many(model, [pk]).get(pk)
+
+    def get_many(self, model, pks):
+        """
+        Returns a dictionary of primary key to instance, loading misses in one query.
+        """
+        label = model._meta.label
+        found = {}
+        wanted = []
+        for pk in dict.fromkeys(pk for pk in pks if pk is not None):
+            obj = self._objects.get((label, pk))
+            if obj is None:
+                wanted.append(pk)
+            else:
+                found[pk] = obj
+
+        self.hits += len(found)
+        self.misses += len(wanted)
+
+        if wanted:
+            _watch(model)
+            for pk, obj in _load(model, wanted).items():
+                self._objects[(label, pk)] = obj
+                found[pk] = obj
+        return found
+
+    def resolve(self, instances, *field_names):
+        """
+        Loads the given foreign keys for every instance with one query per related
+        model, and attaches the results so attribute access does not query again.
+        instances: Iterable of model instances of the same model.
+        field_names: Foreign key field names, e.g. "StoreId", "StaffId".
+        """
+        instances = [instance for instance in instances if instance is not None]
+        if not instances:
+            return instances
+
+        for instance in instances:
+            self.add(instance)
+
+        opts = instances[0]._meta
+        for field_name in field_names:
+            field = opts.get_field(field_name)
+            pending = [
+                instance
+                for instance in instances
+                if not field.is_cached(instance) and getattr(instance, field.attname) is not None
+            ]
+            related = self.get_many(
+                field.related_model, [getattr(instance, field.attname) for instance in pending]
+            )
+            for instance in pending:
+                obj = related.get(getattr(instance, field.attname))
+                if obj is not None:
+                    field.set_cached_value(instance, obj)
+        return instances
+
+
+def _load(model, pks):
+    # Reference models go through the shared read-through cache first.
+    from ERP.reference_cache import cache_for
+
+    cache = cache_for(model)
+    if cache is not None:
+        return cache.get_many(pks)
+    return model._default_manager.in_bulk(pks)
+
+
+def current_identity_map():
+    """
+    Returns the identity map of the current request, or None if none is active.
+    """
+    return _current.get()
+
+
+@contextmanager
+def identity_map():
+    """
+    Activates a fresh identity map for the duration of the block.
+    Nested blocks reuse the outer map.
+    """
+    active = _current.get()
+    if active is not None:
+        yield active
+        return
+
+    _opened()
+    token = _current.set(IdentityMap())
+    try:
+        yield _current.get()
+    finally:
+        _current.reset(token)
+        _closed()
+
+
+def resolve(instances, *field_names):
+    """
+    Batches foreign key resolution for a list of instances, using the active identity
+    map if there is one.
+    """
+    with identity_map() as active:
+        return active.resolve(instances, *field_names)
+
+
+def with_identity_map(view):
+    """
+    View decorator that enables the identity map for a single view.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with identity_map():
+            return view(*args, **kwargs)
+
+    return wrapper
+
+
+class IdentityMapMiddleware:
+    """
+    Opt-in middleware that gives every request its own identity map.
+    Add "ERP.identity_map.IdentityMapMiddleware" to MIDDLEWARE to enable it.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with identity_map():
+            return self.get_response(request)
+
+
+def _discard(sender, instance, **kwargs):
+    active = _current.get()
+    if active is not None:
+        active.discard(sender, instance.pk)
+
+
+def _watch(model):
+    """
+    Connects the receivers that drop saved or deleted instances of model from the
+    active identity map, so a request never reads back a stale copy of a row it has
+    just written.
+    """
+    label = model._meta.label
+    if label in _watched:
+        return
+    with _lock:
+        if label in _watched or not _open_maps:
+            return
+        post_save.connect(_discard, sender=model, dispatch_uid=f"identity-map-save-{label}")
+        post_delete.connect(_discard, sender=model, dispatch_uid=f"identity-map-delete-{label}")
+        _watched[label] = model
+
+
+def _opened():
+    global _open_maps
+    with _lock:
+        _open_maps += 1
+
+
+def _closed():
+    global _open_maps
+    with _lock:
+        _open_maps -= 1
+        if _open_maps:
+            return
+        for label, model in _watched.items():
+            post_save.disconnect(sender=model, dispatch_uid=f"identity-map-save-{label}")
+            post_delete.disconnect(sender=model, dispatch_uid=f"identity-map-delete-{label}")
+        _watched.clear()
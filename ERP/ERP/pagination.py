@@ -0,0 +1,76 @@
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+
+
+# Below this many rows an exact COUNT(*) is cheap enough to run every time.
+ESTIMATE_THRESHOLD = 100000
+
+
+def EstimateRowCount(model, using="default"):
+    """
+    Returns an approximate row count for a model's table without scanning it.
+    model: The model class whose table should be estimated.
+    using: Database alias to query.
+    return: The estimated number of rows, or None if the database has no statistics
+            for the table yet.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                    [table],
+                )
+                row = cursor.fetchone()
+                if row and row[0] >= 0:
+                    return int(row[0])
+
+            elif connection.vendor == "mysql":
+                cursor.execute(
+                    "SELECT table_rows FROM information_schema.tables "
+                    "WHERE table_schema = DATABASE() AND table_name = %s",
+                    [table],
+                )
+                row = cursor.fetchone()
+                if row and row[0] is not None:
+                    return int(row[0])
+
+            elif connection.vendor == "sqlite":
+                # Populated by ANALYZE, with one row per index (or a single row
+                # with no idx for tables without indexes). The first number of
+                # "stat" counts the rows in the index; partial indexes cover
+                # fewer rows, so the largest count is the table's.
+                cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s", [table])
+                counts = [int(stat.split()[0]) for (stat,) in cursor.fetchall()]
+                if counts:
+                    return max(counts)
+    except DatabaseError:
+        pass
+
+    # The highest primary key is no substitute: it overcounts once rows are deleted
+    # or archived, so callers fall back to an exact count.
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that avoids COUNT(*) on large, unfiltered admin changelists.
+    Filtered querysets, and tables the database has no statistics for, still get
+    an exact count.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = getattr(queryset, "query", None)
+
+        if query is not None and not query.where:
+            estimate = EstimateRowCount(queryset.model, queryset.db)
+            if isinstance(estimate, int) and estimate > ESTIMATE_THRESHOLD:
+                return estimate
+
+        return super().count
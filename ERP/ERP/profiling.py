@@ -0,0 +1,322 @@
+import cProfile
+import marshal
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core import signing
+from django.db import connections
+from django.utils import timezone
+
+
+PROFILE_HEADER = "HTTP_X_PROFILE"
+MODE_HEADER = "HTTP_X_PROFILE_MODE"
+MODES = ("cprofile", "sample")
+
+_SALT = "ERP.profiling"
+
+_current = ContextVar("profiling_session", default=None)
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def make_token():
+    """
+    Returns a signed value for the X-Profile header, valid for
+    PROFILE_TOKEN_MAX_AGE seconds.
+    """
+    return signing.TimestampSigner(salt=_SALT).sign("profile")
+
+
+def _valid_token(token):
+    try:
+        signing.TimestampSigner(salt=_SALT).unsign(
+            token, max_age=getattr(settings, "PROFILE_TOKEN_MAX_AGE", 3600)
+        )
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{frame.f_globals.get('__name__', '?')}.{name}".replace(";", ":")
+
+
+class _Sampler(threading.Thread):
+    """
+    Samples the call stack of one thread at a fixed interval into collapsed stacks.
+    """
+
+    def __init__(self, thread_id, interval, stacks):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = stacks
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                names.append(_frame_name(frame))
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+
+class Profile:
+    """
+    Recorded profile of one request or block: spans from @traced functions, the
+    query count, and either cProfile statistics or sampled call stacks.
+    """
+
+    def __init__(self, name, mode):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.mode = mode
+        self.started = timezone.now()
+        self.duration = 0.0
+        self.queries = 0
+        self.status = None
+        self.spans = []
+        self.stacks = Counter()
+        self.stats = None
+        self._open = []
+        self._start = time.perf_counter()
+
+    def _count_query(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+    @contextmanager
+    def span(self, name):
+        """
+        Records the duration and query count of the enclosed block as a span.
+        """
+        path = ";".join([*(span["Name"] for span in self._open), name])
+        span = {
+            "Name": name,
+            "Path": path,
+            "Depth": len(self._open),
+            "Start": round((time.perf_counter() - self._start) * 1000, 3),
+        }
+        queries = self.queries
+        start = time.perf_counter()
+        self._open.append(span)
+        try:
+            yield span
+        finally:
+            self._open.pop()
+            span["Duration"] = round((time.perf_counter() - start) * 1000, 3)
+            span["Queries"] = self.queries - queries
+            self.spans.append(span)
+
+    def collapsed(self):
+        """
+        Returns the profile as collapsed stacks ("a;b;c count" lines), the input
+        format of flamegraph.pl, speedscope and similar tools. Sampled profiles
+        count samples; otherwise each span path counts its self time in microseconds.
+        """
+        if self.stacks:
+            counts = self.stacks
+        else:
+            counts = Counter()
+            for span in self.spans:
+                counts[span["Path"]] += span["Duration"]
+                parent = span["Path"].rpartition(";")[0]
+                if parent:
+                    counts[parent] -= span["Duration"]
+            counts = {path: round(ms * 1000) for path, ms in counts.items()}
+        return "".join(
+            f"{path} {count}\n" for path, count in sorted(counts.items()) if count > 0
+        )
+
+    def top_functions(self, limit=20):
+        """
+        Returns the functions with the highest cumulative time from cProfile stats.
+        """
+        if not self.stats:
+            return []
+        rows = sorted(self.stats.items(), key=lambda item: item[1][3], reverse=True)
+        return [
+            {
+                "Function": f"{os.path.basename(filename)}:{line}({function})",
+                "Calls": calls,
+                "TotalTime": round(total * 1000, 3),
+                "CumulativeTime": round(cumulative * 1000, 3),
+            }
+            for (filename, line, function), (_, calls, total, cumulative, _) in rows[:limit]
+        ]
+
+    def pstats_data(self):
+        """
+        Returns the cProfile statistics in the marshal format read by pstats.Stats.
+        """
+        return marshal.dumps(self.stats) if self.stats else None
+
+    def summary(self):
+        return {
+            "Id": self.id,
+            "Name": self.name,
+            "Mode": self.mode,
+            "Started": self.started,
+            "Duration": self.duration,
+            "Queries": self.queries,
+            "Status": self.status,
+        }
+
+    def as_dict(self):
+        return {
+            **self.summary(),
+            "Spans": sorted(self.spans, key=lambda span: span["Start"]),
+            "TopFunctions": self.top_functions(),
+        }
+
+
+def _ring_buffer():
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = deque(maxlen=getattr(settings, "PROFILE_BUFFER_SIZE", 50))
+        return _buffer
+
+
+def recent_profiles():
+    """
+    Returns the profiles in the ring buffer, newest first.
+    """
+    with _buffer_lock:
+        return list(reversed(_buffer or ()))
+
+
+def get_profile(profile_id):
+    return next((p for p in recent_profiles() if p.id == profile_id), None)
+
+
+def current_profile():
+    """
+    Returns the profile being recorded in this context, or None.
+    """
+    return _current.get()
+
+
+@contextmanager
+def profiling(name, mode="cprofile"):
+    """
+    Records a profile of the enclosed block and stores it in the ring buffer.
+    name: Label of the profile, e.g. the request path.
+    mode: "cprofile" for deterministic function statistics or "sample" for
+          periodic stack samples, which distort timings less.
+    """
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of: {', '.join(MODES)}.")
+
+    profile = Profile(name, mode)
+    token = _current.set(profile)
+    profiler = sampler = None
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile._count_query))
+
+            if mode == "sample":
+                sampler = _Sampler(
+                    threading.get_ident(),
+                    getattr(settings, "PROFILE_SAMPLE_INTERVAL", 0.005),
+                    profile.stacks,
+                )
+                sampler.start()
+            else:
+                profiler = cProfile.Profile()
+                try:
+                    profiler.enable()
+                except ValueError:
+                    # Another profiler is already active; keep spans and queries only.
+                    profiler = None
+
+            try:
+                yield profile
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+                    profiler.create_stats()
+                    profile.stats = profiler.stats
+                if sampler is not None:
+                    sampler.stopped.set()
+                    sampler.join()
+    finally:
+        _current.reset(token)
+        profile.duration = round((time.perf_counter() - profile._start) * 1000, 3)
+        _ring_buffer().append(profile)
+
+
+def traced(name=None):
+    """
+    Decorator recording calls as spans of the active profile. Outside a profile it
+    costs a single context variable lookup.
+    name: Span name (defaults to the function's qualified name).
+    """
+
+    def decorator(fn):
+        label = name or fn.__qualname__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            profile = _current.get()
+            if profile is None:
+                return fn(*args, **kwargs)
+            with profile.span(label):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _requested_mode(request):
+    token = request.META.get(PROFILE_HEADER)
+    if token:
+        allowed = _valid_token(token)
+        mode = request.META.get(MODE_HEADER)
+    else:
+        user = getattr(request, "user", None)
+        allowed = "profile" in request.GET and bool(user and user.is_staff)
+        mode = request.GET.get("profile")
+    if not allowed:
+        return None
+    return mode if mode in MODES else "cprofile"
+
+
+class ProfilingMiddleware:
+    """
+    Opt-in middleware that profiles single requests carrying a valid signed
+    X-Profile header (see make_token), or a "profile" query parameter from a
+    staff user. The mode comes from the X-Profile-Mode header or the parameter
+    value. Add "ERP.profiling.ProfilingMiddleware" to MIDDLEWARE after
+    AuthenticationMiddleware to enable it.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = _requested_mode(request)
+        if mode is None:
+            return self.get_response(request)
+
+        with profiling(f"{request.method} {request.path}", mode) as profile:
+            response = self.get_response(request)
+        profile.status = response.status_code
+        response["X-Profile-Id"] = profile.id
+        return response
@@ -0,0 +1,236 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from ERP.identity_map import current_identity_map
+
+
+# Small, rarely written tables that hot paths keep resolving by primary key.
+REFERENCE_MODELS = (
+    "Inventory_Control.Product",
+    "Inventory_Control.Store",
+    "Procurement.Supplier",
+    "Finance.Department",
+)
+
+_MISSING = object()
+
+
+class ReferenceCache:
+    """
+    Read-through cache of model instances keyed by primary key.
+    Entries live in an in-process LRU and, if REFERENCE_CACHE_ALIAS is set, in a
+    shared Django cache so other processes can reuse them.
+    Returned instances are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, model, maxsize=None, alias=None, timeout=None, local_timeout=None):
+        self.model = model
+        self.maxsize = maxsize or getattr(settings, "REFERENCE_CACHE_SIZE", 1024)
+        self.alias = alias or getattr(settings, "REFERENCE_CACHE_ALIAS", None)
+        self.timeout = timeout or getattr(settings, "REFERENCE_CACHE_TIMEOUT", 300)
+        # Local entries expire so writes made by other processes are eventually seen.
+        self.local_timeout = local_timeout or getattr(
+            settings, "REFERENCE_CACHE_LOCAL_TIMEOUT", 60
+        )
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return caches[self.alias] if self.alias else None
+
+    def key(self, pk):
+        return f"refcache:{self.model._meta.label_lower}:{pk}"
+
+    def get(self, pk):
+        """
+        Returns the instance with the given primary key, or None if it does not exist.
+        """
+        if pk is None:
+            return None
+        return self.get_many([pk]).get(pk)
+
+    def get_many(self, pks):
+        """
+        Returns a dictionary of primary key to instance for the given keys.
+        Keys that do not exist are left out. Misses are loaded with one IN query.
+        """
+        found = {}
+        wanted = []
+        for pk in dict.fromkeys(pk for pk in pks if pk is not None):
+            obj = self._get_local(pk)
+            if obj is _MISSING:
+                wanted.append(pk)
+            else:
+                found[pk] = obj
+
+        if wanted and self.shared is not None:
+            shared_hits = self.shared.get_many([self.key(pk) for pk in wanted])
+            for pk in list(wanted):
+                obj = shared_hits.get(self.key(pk))
+                if obj is not None:
+                    found[pk] = obj
+                    self._set_local(pk, obj)
+                    wanted.remove(pk)
+
+        self.hits += len(found)
+        self.misses += len(wanted)
+
+        if wanted:
+            loaded = self.model._default_manager.in_bulk(wanted)
+            for pk, obj in loaded.items():
+                found[pk] = obj
+                self._set_local(pk, obj)
+            if loaded and self.shared is not None:
+                self.shared.set_many(
+                    {self.key(pk): obj for pk, obj in loaded.items()}, self.timeout
+                )
+
+        return found
+
+    def invalidate(self, pk):
+        """
+        Drops a single entry from the local and shared caches.
+        """
+        with self._lock:
+            self._entries.pop(pk, None)
+        if self.shared is not None:
+            self.shared.delete(self.key(pk))
+
+    def clear(self):
+        """
+        Drops every local entry. Shared entries expire on their own timeout.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def _get_local(self, pk):
+        with self._lock:
+            entry = self._entries.get(pk)
+            if entry is None:
+                return _MISSING
+            obj, expires = entry
+            if expires < time.monotonic():
+                del self._entries[pk]
+                return _MISSING
+            self._entries.move_to_end(pk)
+            return obj
+
+    def _set_local(self, pk, obj):
+        with self._lock:
+            self._entries[pk] = (obj, time.monotonic() + self.local_timeout)
+            self._entries.move_to_end(pk)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def cache_for(model):
+    """
+    Returns the ReferenceCache for a model, or None if the model is not cached.
+    """
+    label = model._meta.label
+    if label not in REFERENCE_MODELS:
+        return None
+    with _caches_lock:
+        if label not in _caches:
+            _caches[label] = ReferenceCache(model)
+        return _caches[label]
+
+
+def clear_all():
+    """
+    Empties the local entries of every reference cache.
+    """
+    with _caches_lock:
+        caches_list = list(_caches.values())
+    for cache in caches_list:
+        cache.clear()
+
+
+def get_object(model, pk):
+    """
+    Returns the instance with the given primary key, or None if it does not exist.
+    Lookups go through the request identity map when one is active, then the
+    reference cache for reference models, then the database.
+    """
+    if pk is None:
+        return None
+
+    active = current_identity_map()
+    if active is not None:
+        return active.get(model, pk)
+
+    cache = cache_for(model)
+    if cache is not None:
+        return cache.get(pk)
+    return model._default_manager.filter(pk=pk).first()
+
+
+def get_related(instance, field_name):
+    """
+    Returns the object a foreign key points at without querying again when the
+    relation is already loaded, the row is in the request identity map, or the
+    related model is a cached reference model.
+    instance: Model instance holding the foreign key.
+    field_name: Name of the foreign key field, e.g. "StoreId".
+    """
+    field = instance._meta.get_field(field_name)
+    if field.is_cached(instance):
+        return getattr(instance, field_name)
+
+    if current_identity_map() is None and cache_for(field.related_model) is None:
+        return getattr(instance, field_name)
+    return get_object(field.related_model, getattr(instance, field.attname))
+
+
+def invalidate(model, pks, using=None):
+    """
+    Drops cached entries of a reference model right away and again once the current
+    transaction commits. Readers in other transactions still see the old rows until
+    then and may cache them again; the second pass removes those copies.
+    model: The model class.
+    pks: Primary keys of the changed rows.
+    using: Database alias of the transaction (defaults to the default database).
+    """
+    cache = cache_for(model)
+    if cache is None:
+        return
+    pks = list(pks)
+
+    def drop():
+        for pk in pks:
+            cache.invalidate(pk)
+
+    drop()
+    transaction.on_commit(drop, using=using)
+
+
+def _invalidate(sender, instance, using=None, **kwargs):
+    invalidate(sender, [instance.pk], using=using)
+
+
+def connect_signals():
+    """
+    Invalidates cached entries whenever a reference model is saved or deleted, and
+    again when the transaction commits.
+    Called once from the Inventory_Control app config.
+    """
+    for label in REFERENCE_MODELS:
+        model = apps.get_model(label)
+        post_save.connect(_invalidate, sender=model, dispatch_uid=f"refcache-save-{label}")
+        post_delete.connect(
+            _invalidate, sender=model, dispatch_uid=f"refcache-delete-{label}"
+        )
@@ -0,0 +1,121 @@
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, StreamingHttpResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Items encoded per chunk by StreamingJsonArrayResponse.
+STREAM_BATCH_SIZE = 1000
+
+
+# orjson encodes dates, times and datetimes itself, writing "Z" for UTC as
+# DjangoJSONEncoder does. The one difference is precision: orjson keeps all six
+# fractional-second digits of times and datetimes where DjangoJSONEncoder keeps three.
+# Only Decimal and other non-native types go through DjangoJSONEncoder.
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z if orjson else 0
+_orjson_default = DjangoJSONEncoder().default
+
+
+def backend():
+    """
+    Returns the encoder in use: "orjson" or "django", from settings.JSON_SERIALIZER
+    ("auto" picks orjson when it is installed).
+    """
+    choice = getattr(settings, "JSON_SERIALIZER", "auto")
+    if choice == "auto":
+        return "orjson" if orjson is not None else "django"
+    if choice == "orjson" and orjson is None:
+        raise ImportError("JSON_SERIALIZER is 'orjson' but orjson is not installed.")
+    return choice
+
+
+def dumps(data):
+    """
+    Encodes data as compact JSON bytes. Decimal values become strings and dates,
+    times and datetimes ISO 8601 strings; orjson writes fractional seconds to the
+    microsecond, DjangoJSONEncoder to the millisecond.
+    """
+    if backend() == "orjson":
+        return orjson.dumps(data, default=_orjson_default, option=_ORJSON_OPTIONS)
+    return json.dumps(data, cls=DjangoJSONEncoder, separators=(",", ":")).encode()
+
+
+def to_columns(rows):
+    """
+    Converts a list of dictionaries with the same keys into column-oriented form,
+    which repeats no keys: {"fields": [...], "columns": [[...], ...]} where
+    columns[i] holds every row's value of fields[i].
+    """
+    rows = list(rows)
+    fields = list(rows[0]) if rows else []
+    return {"fields": fields, "columns": [[row[field] for row in rows] for field in fields]}
+
+
+def _is_records(value):
+    return isinstance(value, list) and bool(value) and all(isinstance(v, dict) for v in value)
+
+
+def columnar(data):
+    """
+    Returns data with every list of dictionaries (at the top level or directly under
+    a top-level key) converted by to_columns.
+    """
+    if _is_records(data):
+        return to_columns(data)
+    if isinstance(data, dict):
+        return {key: to_columns(value) if _is_records(value) else value for key, value in data.items()}
+    return data
+
+
+class FastJsonResponse(HttpResponse):
+    """
+    JsonResponse counterpart that encodes with the configured serializer.
+    """
+
+    def __init__(self, data, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError("Set safe=False to serialize non-dict objects.")
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(content=dumps(data), **kwargs)
+
+
+class StreamingJsonArrayResponse(StreamingHttpResponse):
+    """
+    Streams an iterable as a JSON array, encoding it in batches so large result sets
+    are never held in memory or encoded as one document.
+    """
+
+    def __init__(self, items, batch_size=STREAM_BATCH_SIZE, **kwargs):
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(self._chunks(items, batch_size), **kwargs)
+
+    @staticmethod
+    def _chunks(items, batch_size):
+        yield b"["
+        batch = []
+        first = True
+        for item in items:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                yield (b"" if first else b",") + dumps(batch)[1:-1]
+                first = False
+                batch = []
+        if batch:
+            yield (b"" if first else b",") + dumps(batch)[1:-1]
+        yield b"]"
+
+
+def json_response(request, data, status=200):
+    """
+    Returns data as a FastJsonResponse, in column-oriented form when the request asks
+    for ?format=columns.
+    """
+    if request.GET.get("format") == "columns":
+        data = columnar(data)
+    return FastJsonResponse(data, safe=False, status=status)
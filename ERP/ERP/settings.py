@@ -31,10 +31,10 @@ ALLOWED_HOSTS = []
 # Application definition
 
 INSTALLED_APPS = [
-    "Inventory_Control.apps.Inventory_ControlConfig",
+    "Inventory_Control.apps.InventoryControlConfig",
     "Sales.apps.SalesConfig",
     "Procurement.apps.ProcurementConfig",
-    "Human_Resources.apps.Human_ResourcesConfig",
+    "Human_Resources.apps.HumanResourcesConfig",
     "Finance.apps.FinanceConfig",
     "django.contrib.admin",
     "django.contrib.auth",
@@ -52,6 +52,10 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    # Opt-in: "ERP.identity_map.IdentityMapMiddleware" deduplicates primary key
+    # lookups within each request.
+    # Opt-in: "ERP.profiling.ProfilingMiddleware" profiles single requests that
+    # carry a signed X-Profile header or come from staff with ?profile=.
 ]
 
 ROOT_URLCONF = "ERP.urls"
@@ -126,3 +130,55 @@ STATIC_URL = "static/"
 # https://docs.djangoproject.com/en/4.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Read-through cache for reference rows (Product, Store, Supplier, Department).
+# Set REFERENCE_CACHE_ALIAS to a CACHES alias to share entries between processes.
+
+REFERENCE_CACHE_SIZE = 1024
+
+REFERENCE_CACHE_ALIAS = None
+
+REFERENCE_CACHE_TIMEOUT = 300
+
+REFERENCE_CACHE_LOCAL_TIMEOUT = 60
+
+# Uploaded CSV files and their checkpoints for background catalogue imports.
+
+IMPORT_ROOT = BASE_DIR / "imports"
+
+# Seconds of recent stock ledger movements that compact_stock_ledger leaves alone,
+# so transactions still in flight are not skipped.
+
+LEDGER_COMPACTION_LAG = 60
+
+# Seconds a Facade.TriggerPurchaseOrder result is reused for the same product, so
+# bursts of reorder triggers from several POS nodes cost one computation.
+
+REORDER_RESULT_TTL = 5
+
+# Maximum number of operations accepted by one request to the batch endpoint.
+
+BATCH_MAX_OPERATIONS = 100
+
+# Product search backend: "fts5" (SQLite full-text index), "memory" (in-process
+# inverted index) or "auto" to use FTS5 whenever the database supports it.
+
+PRODUCT_SEARCH_BACKEND = "auto"
+
+# Best-ranked matches that stock filters and Category facets are computed over.
+
+PRODUCT_SEARCH_MAX_CANDIDATES = 1000
+
+# Request profiling: number of recent profiles kept in memory per process, seconds
+# a signed X-Profile token stays valid, and the stack sampling interval.
+
+PROFILE_BUFFER_SIZE = 50
+
+PROFILE_TOKEN_MAX_AGE = 3600
+
+PROFILE_SAMPLE_INTERVAL = 0.005
+
+# JSON encoder for API responses: "orjson" (optional dependency), "django"
+# (DjangoJSONEncoder) or "auto" to use orjson whenever it is installed.
+
+JSON_SERIALIZER = "auto"
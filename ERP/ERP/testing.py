@@ -0,0 +1,19 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from ERP import reference_cache
+
+
+class QueryCountTestCase(TestCase):
+    """
+    TestCase for asserting query counts of model methods.
+    Every test starts with cold reference and result caches, so counts do not
+    depend on which tests ran before it.
+    """
+
+    def setUp(self):
+        super().setUp()
+        reference_cache.clear_all()
+        cache.clear()
+        self.addCleanup(reference_cache.clear_all)
+        self.addCleanup(cache.clear)
@@ -0,0 +1,269 @@
+import json
+
+from unittest import mock
+
+from django.contrib.auth.models import Permission, User
+from django.db import connection
+from django.db.models.deletion import Collector
+from django.test import Client, override_settings
+
+from ERP import reference_cache
+from ERP.batch import execute_batch
+from ERP import pagination
+from ERP.facade import Facade
+from ERP.identity_map import identity_map
+from ERP.profiling import get_profile, make_token, profiling
+from ERP.testing import QueryCountTestCase
+from Finance.models import Department
+from Human_Resources.models import Staff
+from Inventory_Control.models import Product, StockLocation, Store
+from Procurement.models import Supplier
+from Sales.models import Sales
+
+
+class BatchTests(QueryCountTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.supplier = Supplier.objects.create(
+            SupplierName="Acme", ContactDetails="x", Location="y", ContractTerms="z"
+        )
+        cls.store = Store.objects.create(
+            StoreName="West", Location="Pier", ContactNumber="1", TotalSales=80, OperatingHours=8
+        )
+        department = Department.objects.create(DepartmentName="Sales", Budget=100)
+        cls.staff = [
+            Staff.objects.create(StaffName=f"S{i}", Role="Clerk", Salary=1, DepartmentId=department)
+            for i in range(3)
+        ]
+        cls.products = [
+            Product.objects.create(
+                ProductName=f"P{i}", Category="C", Price=1, StockLevel=0, ReorderLevel=1
+            )
+            for i in range(3)
+        ]
+        for i, product in enumerate(cls.products):
+            StockLocation.objects.create(ProductId=product, StoreId=cls.store, Quantity=i + 1)
+        cls.sales = [
+            Sales.objects.create(
+                PaymentMethod="Card",
+                TotalAmount=5,
+                StoreId=cls.store,
+                ProductId=cls.products[0],
+                StaffId=staff,
+            )
+            for staff in cls.staff
+        ]
+
+    def test_operations_are_batched(self):
+        operations = (
+            [{"id": f"p{p.pk}", "op": "GetStockLevel", "args": {"productId": p.pk}} for p in self.products]
+            + [{"id": f"s{s.pk}", "op": "GetStaffData", "args": {"staffId": s.pk}} for s in self.staff]
+            + [{"id": f"o{s.pk}", "op": "GetSalesData", "args": {"salesId": s.pk}} for s in self.sales]
+            + [
+                {"id": "store", "op": "ViewStorePerformance", "args": {"storeId": self.store.pk}},
+                {"id": "supplier", "op": "GetSupplierData", "args": {"supplierId": self.supplier.pk}},
+            ]
+        )
+        # Products, stock with the ledger tail; staff and their department; sales;
+        # store; supplier. The sales' staff and store come from the identity map.
+        with self.assertNumQueries(7):
+            results = execute_batch(operations)
+
+        self.assertEqual([r["id"] for r in results], [o["id"] for o in operations])
+        self.assertEqual([r["result"] for r in results[:3]], [1, 2, 3])
+        self.assertEqual(results[3]["result"]["Department"], "Sales")
+        self.assertEqual(results[6]["result"]["Staff"], "S0")
+        self.assertEqual(results[9]["result"]["AverageSalesPerHour"], 10)
+        self.assertEqual(results[10]["result"]["SupplierName"], "Acme")
+
+    def test_errors_are_reported_per_operation(self):
+        results = execute_batch(
+            [
+                {"id": 1, "op": "GetStockLevel", "args": {"productId": 999999}},
+                {"id": 2, "op": "Unknown"},
+                {"id": 3, "op": "GetStaffData", "args": {}},
+                {"id": 4, "op": "GetStockLevel", "args": {"productId": self.products[2].pk}},
+            ]
+        )
+        self.assertEqual(results[0]["error"], "Product ID 999999 does not exist.")
+        self.assertEqual(results[1]["error"], "Unknown operation 'Unknown'.")
+        self.assertEqual(results[2]["error"], "staffId must be an integer.")
+        self.assertEqual(results[3]["result"], 3)
+
+    def test_view_checks_permissions_per_operation(self):
+        def post(client):
+            return client.post(
+                "/batch/",
+                json.dumps(
+                    {
+                        "operations": [
+                            {"id": "a", "op": "GetStockLevel", "args": {"productId": self.products[0].pk}},
+                            {"id": "b", "op": "GetStaffData", "args": {"staffId": self.staff[0].pk}},
+                        ]
+                    }
+                ),
+                content_type="application/json",
+            )
+
+        self.assertEqual(post(self.client).status_code, 302)
+
+        user = User.objects.create_user("clerk", password="x", is_staff=True)
+        user.user_permissions.add(Permission.objects.get(codename="view_product"))
+        self.client.force_login(user)
+        response = post(self.client)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {
+                "results": [
+                    {"id": "a", "result": 1},
+                    {"id": "b", "error": "You do not have permission to run GetStaffData."},
+                ]
+            },
+        )
+
+        strict = Client(enforce_csrf_checks=True)
+        strict.force_login(user)
+        self.assertEqual(post(strict).status_code, 403)
+
+
+class ProfilingTests(QueryCountTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = Product.objects.create(
+            ProductName="Fan", Category="C", Price=1, StockLevel=0, ReorderLevel=1
+        )
+
+    def test_traced_methods_record_spans(self):
+        with profiling("test") as profile:
+            Facade().TriggerPurchaseOrder(self.product.pk)
+
+        spans = {span["Name"]: span for span in profile.spans}
+        self.assertEqual(spans["Facade.TriggerPurchaseOrder"]["Depth"], 0)
+        self.assertEqual(spans["Product.GetStockLevel"]["Path"], "Facade.TriggerPurchaseOrder;Product.GetStockLevel")
+        self.assertEqual(spans["Product.GetStockLevel"]["Queries"], 1)
+        self.assertEqual(spans["Facade.TriggerPurchaseOrder"]["Queries"], profile.queries)
+        self.assertIn("Facade.TriggerPurchaseOrder;Product.GetStockLevel ", profile.collapsed())
+        self.assertIsNotNone(profile.pstats_data())
+
+    @override_settings(
+        MIDDLEWARE=[
+            "django.contrib.sessions.middleware.SessionMiddleware",
+            "django.contrib.auth.middleware.AuthenticationMiddleware",
+            "ERP.profiling.ProfilingMiddleware",
+        ]
+    )
+    def test_signed_header_profiles_request(self):
+        url = "/inventory/search/?q=fan"
+        self.assertNotIn("X-Profile-Id", self.client.get(url))
+        self.assertNotIn("X-Profile-Id", self.client.get(url, HTTP_X_PROFILE="forged:token"))
+
+        response = self.client.get(url, HTTP_X_PROFILE=make_token(), HTTP_X_PROFILE_MODE="sample")
+        profile = get_profile(response["X-Profile-Id"])
+        self.assertEqual((profile.mode, profile.status), ("sample", 200))
+        self.assertGreater(profile.queries, 0)
+
+        staff = User.objects.create_user("ops", password="x", is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(f"/profiles/{profile.id}/collapsed/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get("/profiles/").json()["profiles"][0]["Id"], profile.id)
+
+
+class ReferenceCacheTests(QueryCountTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.stores = [
+            Store.objects.create(
+                StoreName=name, Location="A", ContactNumber="1", TotalSales=0, OperatingHours=8
+            )
+            for name in ("North", "South")
+        ]
+
+    def test_get_many_loads_misses_once(self):
+        cache = reference_cache.cache_for(Store)
+        pks = [store.pk for store in self.stores]
+        hits, misses = cache.hits, cache.misses
+        with self.assertNumQueries(1):
+            found = cache.get_many([*pks, pks[0], None, 999999])
+        self.assertEqual({pk: store.StoreName for pk, store in found.items()}, {pks[0]: "North", pks[1]: "South"})
+
+        with self.assertNumQueries(0):
+            self.assertEqual(list(cache.get_many(pks)), pks)
+        self.assertEqual((cache.hits - hits, cache.misses - misses), (2, 3))
+
+    def test_save_and_delete_invalidate_after_commit(self):
+        cache = reference_cache.cache_for(Store)
+        north = self.stores[0]
+        stale = cache.get(north.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            north.StoreName = "Harbour"
+            north.save()
+            self.assertEqual(cache.get(north.pk).StoreName, "Harbour")
+            # A reader in another transaction still sees and caches the old row.
+            cache._set_local(north.pk, stale)
+        self.assertEqual(cache.get(north.pk).StoreName, "Harbour")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Store.objects.get(pk=north.pk).delete()
+            cache._set_local(north.pk, stale)
+        self.assertIsNone(cache.get(north.pk))
+
+
+class IdentityMapTests(QueryCountTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = Staff.objects.create(StaffName="Alex", Role="Clerk", Salary=1)
+
+    def test_saved_rows_are_dropped_from_the_map(self):
+        with identity_map() as active:
+            self.assertEqual(active.get(Staff, self.member.pk).StaffName, "Alex")
+            member = Staff.objects.get(pk=self.member.pk)
+            member.StaffName = "Sam"
+            member.save()
+            self.assertEqual(active.get(Staff, self.member.pk).StaffName, "Sam")
+            member.delete()
+            self.assertIsNone(active.get(Staff, self.member.pk))
+
+    def test_deletes_stay_fast_outside_maps_and_unheld_models(self):
+        def fast(model):
+            return Collector(using="default").can_fast_delete(model.objects.all())
+
+        self.assertTrue(fast(Sales))
+        with identity_map() as active:
+            active.get(Staff, self.member.pk)
+            self.assertTrue(fast(Sales))
+            active.get_many(Sales, [1])
+            self.assertFalse(fast(Sales))
+        self.assertTrue(fast(Sales))
+
+
+class EstimatedCountPaginatorTests(QueryCountTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(5):
+            Product.objects.create(ProductName=f"P{i}", Category="C", Price=1, StockLevel=0, ReorderLevel=1)
+
+    def paginator(self, queryset):
+        return pagination.EstimatedCountPaginator(queryset.order_by("pk"), 2)
+
+    @mock.patch.object(pagination, "ESTIMATE_THRESHOLD", 1)
+    def test_counts_exactly_without_statistics(self):
+        # Deleted rows leave gaps, so MAX(pk) would report 5.
+        Product.objects.filter(ProductName__in=["P3", "P4"]).delete()
+        if connection.vendor == "sqlite":
+            self.assertIsNone(pagination.EstimateRowCount(Product))
+        self.assertEqual(self.paginator(Product.objects.all()).count, 3)
+
+    @mock.patch.object(pagination, "ESTIMATE_THRESHOLD", 1)
+    def test_uses_statistics_for_unfiltered_lists(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("Statistics are refreshed differently on this backend.")
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        Product.objects.filter(ProductName="P4").delete()
+
+        # The estimate is as of the last ANALYZE; filtered lists are counted exactly.
+        self.assertEqual(self.paginator(Product.objects.all()).count, 5)
+        self.assertEqual(self.paginator(Product.objects.filter(Category="C")).count, 4)
@@ -16,6 +16,36 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path
 
+from ERP import views as erp_views
+from Inventory_Control import views as inventory_views
+from Sales import views as sales_views
+
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("batch/", erp_views.batch, name="batch"),
+    path("profiles/", erp_views.profile_list, name="profile_list"),
+    path("profiles/<str:profile_id>/", erp_views.profile_detail, name="profile_detail"),
+    path(
+        "profiles/<str:profile_id>/<str:output>/",
+        erp_views.profile_download,
+        name="profile_download",
+    ),
+    path(
+        "inventory/stock-valuation/",
+        inventory_views.stock_valuation_report,
+        name="stock_valuation_report",
+    ),
+    path(
+        "sales/performance/",
+        sales_views.SalesPerformanceGraphView,
+        name="sales_performance",
+    ),
+    path("sales/export/", sales_views.SalesExportView, name="sales_export"),
+    path("inventory/search/", inventory_views.product_search, name="product_search"),
+    path("inventory/import/", inventory_views.import_catalogue, name="import_catalogue"),
+    path(
+        "inventory/import/<str:job_id>/",
+        inventory_views.import_status,
+        name="import_status",
+    ),
 ]
@@ -0,0 +1,95 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, JsonResponse
+from ERP.batch import BatchError
+from ERP.facade import Facade
+from ERP.profiling import get_profile, recent_profiles
+from ERP.serializers import json_response
+import json
+
+
+@staff_member_required
+def batch(request):
+    """
+    Function-based view running several read operations in one request.
+
+    :param request: The HTTP request object. The body is a JSON object with an
+                    "operations" list, e.g.
+                    {"operations": [{"id": "a", "op": "GetStockLevel", "args": {"productId": 1}}]}.
+                    Each operation needs the view permission of the model it reads.
+    :return: A JsonResponse with one result or error per operation, in order.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "Only POST method is allowed."}, status=405)
+
+    try:
+        body = json.loads(request.body)
+        results = Facade().ExecuteBatch(body.get("operations"), request.user)
+        return json_response(request, {"results": results})
+    # Errors
+    except (json.JSONDecodeError, AttributeError):
+        return JsonResponse({"error": "Invalid JSON format."}, status=400)
+    # Errors
+    except BatchError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    # Errors
+    except Exception as e:
+        return JsonResponse({"error": f"An error occurred: {str(e)}"}, status=500)
+
+
+@staff_member_required
+def profile_list(request):
+    """
+    Function-based view listing the profiles in the ring buffer, newest first.
+
+    :param request: The HTTP request object.
+    :return: A JsonResponse with a summary of each profile.
+    """
+    return JsonResponse({"profiles": [p.summary() for p in recent_profiles()]}, status=200)
+
+
+@staff_member_required
+def profile_detail(request, profile_id):
+    """
+    Function-based view returning one profile with its spans and top functions.
+
+    :param request: The HTTP request object.
+    :param profile_id: The ID from the X-Profile-Id response header.
+    :return: A JsonResponse with the profile.
+    """
+    profile = get_profile(profile_id)
+    if profile is None:
+        return JsonResponse({"error": f"Profile {profile_id} not found."}, status=404)
+    return JsonResponse(profile.as_dict(), status=200)
+
+
+@staff_member_required
+def profile_download(request, profile_id, output):
+    """
+    Function-based view downloading a profile as collapsed stacks for flame graph
+    tools ("collapsed") or as a cProfile dump for pstats/snakeviz ("pstats").
+
+    :param request: The HTTP request object.
+    :param profile_id: The ID from the X-Profile-Id response header.
+    :param output: "collapsed" or "pstats".
+    :return: An HttpResponse with the file.
+    """
+    profile = get_profile(profile_id)
+    if profile is None:
+        return JsonResponse({"error": f"Profile {profile_id} not found."}, status=404)
+
+    if output == "collapsed":
+        response = HttpResponse(profile.collapsed(), content_type="text/plain")
+        filename = f"{profile_id}.collapsed.txt"
+    elif output == "pstats":
+        data = profile.pstats_data()
+        if data is None:
+            return JsonResponse(
+                {"error": "Only cprofile mode profiles have pstats data."}, status=404
+            )
+        response = HttpResponse(data, content_type="application/octet-stream")
+        filename = f"{profile_id}.pstats"
+    else:
+        return JsonResponse({"error": "output must be collapsed or pstats."}, status=400)
+
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
@@ -2,4 +2,11 @@ from django.contrib import admin
 
 from .models import *
 
-admin.site.register(Department)
+
+@admin.register(Department)
+class DepartmentAdmin(admin.ModelAdmin):
+    list_display = ("DepartmentId", "DepartmentName", "ManagerId", "Budget")
+    list_select_related = ("ManagerId__DepartmentId",)
+    search_fields = ("DepartmentName",)
+    autocomplete_fields = ("ManagerId",)
+    ordering = ("DepartmentId",)
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-19 17:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Department',
+            fields=[
+                ('DepartmentId', models.AutoField(primary_key=True, serialize=False, unique=True)),
+                ('DepartmentName', models.CharField(max_length=200)),
+                ('Budget', models.IntegerField()),
+            ],
+        ),
+    ]
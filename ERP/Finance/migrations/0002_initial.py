@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-19 17:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('Finance', '0001_initial'),
+        ('Human_Resources', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='department',
+            name='ManagerId',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='department', to='Human_Resources.staff'),
+        ),
+    ]
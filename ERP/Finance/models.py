@@ -1,11 +1,12 @@
 from django.db import models
+from ERP.reference_cache import get_related
 
 
 class Department(models.Model):
     DepartmentId = models.AutoField(primary_key=True, unique=True)
     DepartmentName = models.CharField(max_length=200)
     ManagerId = models.OneToOneField(
-        "HR.Staff",
+        "Human_Resources.Staff",
         on_delete=models.SET_NULL,
         null=True,
         blank=True,
@@ -14,8 +15,8 @@ class Department(models.Model):
     Budget = models.IntegerField()
 
     def __str__(self):
-        if self.ManagerId:
-            return f"{self.DepartmentName} - Manager: {self.ManagerId.StaffName}"
+        if self.ManagerId_id:
+            return f"{self.DepartmentName} - Manager: {get_related(self, 'ManagerId').StaffName}"
         return f"{self.DepartmentName}"
 
     def GetDepartmentBudget(self):
@@ -1,3 +1,27 @@
-from django.test import TestCase
+from ERP.identity_map import identity_map
+from ERP.testing import QueryCountTestCase
+from Human_Resources.models import Staff
+from .models import Department
 
-# Create your tests here.
+
+class DepartmentQueryCountTests(QueryCountTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = Staff.objects.create(StaffName="Robin", Role="Manager", Salary=300)
+        cls.department = Department.objects.create(
+            DepartmentName="Operations", Budget=1000, ManagerId=cls.manager
+        )
+
+    def test_str_without_manager_does_not_query(self):
+        department = Department.objects.create(DepartmentName="Empty", Budget=0)
+        department = Department.objects.get(pk=department.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(str(department), "Empty")
+
+    def test_str_loads_manager_once_per_request(self):
+        with identity_map():
+            first = Department.objects.get(pk=self.department.pk)
+            second = Department.objects.get(pk=self.department.pk)
+            with self.assertNumQueries(1):
+                str(first)
+                str(second)
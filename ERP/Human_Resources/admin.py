@@ -2,4 +2,11 @@ from django.contrib import admin
 
 from .models import *
 
-admin.site.register(Staff)
+
+@admin.register(Staff)
+class StaffAdmin(admin.ModelAdmin):
+    list_display = ("StaffId", "StaffName", "Role", "DepartmentId", "HireDate")
+    list_select_related = ("DepartmentId__ManagerId",)
+    search_fields = ("StaffName", "Role")
+    autocomplete_fields = ("DepartmentId",)
+    ordering = ("StaffId",)
@@ -2,6 +2,8 @@ from django.db import models
 from Finance.models import Department
 from django.db.models import Sum, Avg, Count
 from datetime import datetime, timedelta
+from ERP.profiling import traced
+from ERP.reference_cache import get_related
 
 
 class Staff(models.Model):
@@ -19,10 +21,11 @@ class Staff(models.Model):
     HireDate = models.DateField(auto_now_add=True)
 
     def __str__(self):
-        if self.DepartmentId:
-            return f"{self.StaffName} - Role: {self.Role} - In: {self.DepartmentId.DepartmentName}"
+        if self.DepartmentId_id:
+            return f"{self.StaffName} - Role: {self.Role} - In: {get_related(self, 'DepartmentId').DepartmentName}"
         return f"{self.StaffName} - Role: {self.Role}"
 
+    @traced()
     def GetStaffData(self):
         """
         Returns the staff member's data as a dictionary.
@@ -33,7 +36,9 @@ class Staff(models.Model):
             "Role": self.Role,
             "Salary": self.Salary,
             "Department": (
-                self.DepartmentId.DepartmentName if self.DepartmentId else None
+                get_related(self, "DepartmentId").DepartmentName
+                if self.DepartmentId_id
+                else None
             ),
             "HireDate": self.HireDate,
         }
@@ -65,6 +70,7 @@ class Staff(models.Model):
         self.full_clean()  # Validate all fields
         self.save()
 
+    @traced()
     def ViewPerformance(self, date_range=30):
         """
         Analyzes performance metrics for a staff member over a specified period.
@@ -1,3 +1,36 @@
-from django.test import TestCase
+from ERP.identity_map import identity_map
+from ERP.testing import QueryCountTestCase
+from Finance.models import Department
+from .models import Staff
 
-# Create your tests here.
+
+class StaffQueryCountTests(QueryCountTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(DepartmentName="Finance", Budget=1000)
+        for name in ("Alex", "Sam", "Jo"):
+            Staff.objects.create(
+                StaffName=name, Role="Clerk", Salary=100, DepartmentId=cls.department
+            )
+
+    def test_str_and_staff_data_share_department_lookup(self):
+        staff = list(Staff.objects.all())
+        with self.assertNumQueries(1):
+            for member in staff:
+                str(member)
+                member.GetStaffData()
+
+    def test_department_change_is_visible(self):
+        member = Staff.objects.first()
+        str(member)
+        self.department.DepartmentName = "Accounts"
+        self.department.save()
+        member = Staff.objects.get(pk=member.pk)
+        self.assertIn("Accounts", str(member))
+
+    def test_identity_map_serves_repeat_lookups(self):
+        with identity_map() as active, self.assertNumQueries(2):
+            for member in Staff.objects.all():
+                str(member)
+        self.assertEqual(active.misses, 1)
+        self.assertEqual(active.hits, 2)
@@ -1,7 +1,162 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.db import transaction
 
+from ERP.pagination import EstimatedCountPaginator
+from .ledger import current_levels, location_level_expression, record_movements
 from .models import *
 
-admin.site.register(Product)
-admin.site.register(Store)
-admin.site.register(StockLocation)
+
+class AdjustStockActionForm(ActionForm):
+    quantity = forms.IntegerField(
+        required=False, help_text="Positive to increase stock, negative to decrease."
+    )
+
+
+@admin.register(Product)
+class ProductAdmin(admin.ModelAdmin):
+    list_display = (
+        "ProductId",
+        "ProductName",
+        "Category",
+        "Price",
+        "StockLevel",
+        "ReorderLevel",
+        "SupplierId",
+    )
+    list_select_related = ("SupplierId",)
+    search_fields = ("ProductName",)
+    autocomplete_fields = ("SupplierId",)
+    ordering = ("ProductId",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(Store)
+class StoreAdmin(admin.ModelAdmin):
+    list_display = ("StoreId", "StoreName", "Location", "ContactNumber", "TotalSales")
+    search_fields = ("StoreName", "Location")
+    autocomplete_fields = ("ManagerId",)
+    ordering = ("StoreId",)
+
+
+@admin.register(StockLocation)
+class StockLocationAdmin(admin.ModelAdmin):
+    list_display = ("StockLocationId", "ProductId", "StoreId", "current_quantity", "Date")
+    list_select_related = ("ProductId", "StoreId")
+    raw_id_fields = ("ProductId", "StoreId")
+    date_hierarchy = "Date"
+    ordering = ("-StockLocationId",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    action_form = AdjustStockActionForm
+    actions = ["adjust_stock"]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(Current=location_level_expression())
+
+    @admin.display(description="Quantity", ordering="Current")
+    def current_quantity(self, obj):
+        return obj.Current
+
+    # Quantity is only rewritten by ledger compaction; change stock through
+    # adjustments instead.
+    def get_readonly_fields(self, request, obj=None):
+        return ("Quantity",) if obj is not None else ()
+
+    def save_model(self, request, obj, form, change):
+        """
+        Records the quantity of a new location as an opening stock receipt, so it
+        goes through the ledger like every other stock change.
+        """
+        if change:
+            return super().save_model(request, obj, form, change)
+
+        opening = obj.Quantity
+        obj.Quantity = 0
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            if opening:
+                record_movements(
+                    [
+                        StockMovement(
+                            ProductId=obj.ProductId,
+                            StoreId=obj.StoreId,
+                            Kind=StockMovement.RECEIPT,
+                            Quantity=opening,
+                            Reference=f"Opening stock by {request.user}",
+                        )
+                    ]
+                )
+
+    @admin.action(description="Adjust stock of selected locations by quantity")
+    def adjust_stock(self, request, queryset):
+        """
+        Records the same stock adjustment for every selected location in one ledger
+        insert. Locations that would go below zero are left unchanged.
+        """
+        try:
+            quantity = int(request.POST.get("quantity") or 0)
+        except ValueError:
+            quantity = 0
+
+        if not quantity:
+            self.message_user(
+                request, "Enter a non-zero quantity to adjust by.", messages.ERROR
+            )
+            return
+
+        selected = list(queryset.values_list("ProductId", "StoreId"))
+        levels = current_levels(
+            product_ids={product for product, _ in selected},
+            store_ids={store for _, store in selected},
+        )
+        movements = [
+            StockMovement(
+                ProductId_id=product,
+                StoreId_id=store,
+                Kind=StockMovement.ADJUSTMENT,
+                Quantity=quantity,
+                Reference=f"Admin adjustment by {request.user}",
+            )
+            for product, store in selected
+            if levels.get((product, store), 0) + quantity >= 0
+        ]
+        record_movements(movements)
+        skipped = len(selected) - len(movements)
+
+        self.message_user(request, f"Adjusted stock for {len(movements)} location(s).")
+        if skipped:
+            self.message_user(
+                request,
+                f"Skipped {skipped} location(s) with insufficient stock.",
+                messages.WARNING,
+            )
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = (
+        "MovementId",
+        "Timestamp",
+        "Kind",
+        "ProductId",
+        "StoreId",
+        "Quantity",
+        "Reference",
+    )
+    list_select_related = ("ProductId", "StoreId")
+    list_filter = ("Kind",)
+    raw_id_fields = ("ProductId", "StoreId")
+    date_hierarchy = "Timestamp"
+    ordering = ("-MovementId",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    # The ledger is append-only; corrections are new adjustment movements.
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class InventoryControlConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "Inventory_Control"
+
+    def ready(self):
+        from ERP import reference_cache
+        from Inventory_Control import search
+
+        reference_cache.connect_signals()
+        search.connect_signals()
@@ -0,0 +1,391 @@
+import csv
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.core.management.color import no_style
+from django.db import connections, router, transaction
+
+from ERP.reference_cache import invalidate
+from Inventory_Control.ledger import current_levels, record_movements
+from Inventory_Control.models import Product, StockMovement, Store
+from Inventory_Control.search import index_products
+from Procurement.models import Supplier
+
+
+DEFAULT_CHUNK_SIZE = 5000
+
+# Only the first errors are kept in the checkpoint; the rest are just counted.
+MAX_REPORTED_ERRORS = 1000
+
+# Columns each kind of file must provide. The primary key column is the upsert key,
+# except for stock, which is keyed on (ProductId, StoreName).
+# Products may also give LastPurchaseDate and SupplierName; existing products keep
+# their values for whichever of those columns a file leaves out.
+COLUMNS = {
+    "suppliers": ("SupplierId", "SupplierName", "ContactDetails", "Location", "ContractTerms"),
+    "products": (
+        "ProductId",
+        "ProductName",
+        "Category",
+        "Price",
+        "StockLevel",
+        "ReorderLevel",
+    ),
+    "stock": ("ProductId", "StoreName", "Quantity"),
+}
+
+
+class CatalogueImportError(Exception):
+    pass
+
+
+def _text(row, field, max_length, required=True):
+    value = (row.get(field) or "").strip()
+    if required and not value:
+        raise ValueError(f"{field} is required.")
+    if len(value) > max_length:
+        raise ValueError(f"{field} is longer than {max_length} characters.")
+    return value
+
+
+def _integer(row, field, minimum=0):
+    try:
+        value = int((row.get(field) or "").strip())
+    except ValueError:
+        raise ValueError(f"{field} must be an integer.")
+    if value < minimum:
+        raise ValueError(f"{field} must be at least {minimum}.")
+    return value
+
+
+def _clean_supplier(row):
+    return {
+        "SupplierId": _integer(row, "SupplierId", minimum=1),
+        "SupplierName": _text(row, "SupplierName", 200),
+        "ContactDetails": _text(row, "ContactDetails", 200, required=False),
+        "Location": _text(row, "Location", 200, required=False),
+        "ContractTerms": _text(row, "ContractTerms", 200, required=False),
+    }
+
+
+def _clean_product(row):
+    try:
+        price = Decimal((row.get("Price") or "").strip())
+    except InvalidOperation:
+        raise ValueError("Price must be a decimal number.")
+    if price < 0 or price.as_tuple().exponent < -2 or abs(price) >= Decimal("1e8"):
+        raise ValueError("Price must be non-negative with at most 8 digits and 2 decimals.")
+
+    last_purchase = (row.get("LastPurchaseDate") or "").strip()
+    try:
+        last_purchase = date.fromisoformat(last_purchase) if last_purchase else None
+    except ValueError:
+        raise ValueError("LastPurchaseDate must be a date (YYYY-MM-DD).")
+
+    return {
+        "ProductId": _integer(row, "ProductId", minimum=1),
+        "ProductName": _text(row, "ProductName", 200),
+        "Category": _text(row, "Category", 100),
+        "Price": price,
+        "StockLevel": _integer(row, "StockLevel"),
+        "ReorderLevel": _integer(row, "ReorderLevel"),
+        "LastPurchaseDate": last_purchase,
+        "SupplierName": _text(row, "SupplierName", 200, required=False),
+    }
+
+
+def _clean_stock(row):
+    return {
+        "ProductId": _integer(row, "ProductId", minimum=1),
+        "StoreName": _text(row, "StoreName", 200),
+        "Quantity": _integer(row, "Quantity"),
+    }
+
+
+CLEANERS = {
+    "suppliers": _clean_supplier,
+    "products": _clean_product,
+    "stock": _clean_stock,
+}
+
+
+def validate_chunk(kind, rows):
+    """
+    Validates and converts one chunk of CSV rows. Runs in a worker process, so it
+    must not touch the database.
+    kind: One of "suppliers", "products" or "stock".
+    rows: List of (line number, row dictionary) pairs.
+    return: (cleaned rows, list of (line number, error message)).
+    """
+    clean = CLEANERS[kind]
+    cleaned = []
+    errors = []
+    for line, row in rows:
+        try:
+            cleaned.append((line, clean(row)))
+        except ValueError as e:
+            errors.append((line, str(e)))
+    return cleaned, errors
+
+
+def _invalidate(model, objs):
+    # bulk_create sends no post_save signals, so drop cached copies explicitly.
+    invalidate(model, [obj.pk for obj in objs])
+
+
+def _upsert_suppliers(rows, columns):
+    # A later row for the same supplier wins.
+    objs = list({values["SupplierId"]: Supplier(**values) for _, values in rows}.values())
+    Supplier.objects.bulk_create(
+        objs,
+        update_conflicts=True,
+        unique_fields=["SupplierId"],
+        update_fields=["SupplierName", "ContactDetails", "Location", "ContractTerms"],
+    )
+    _invalidate(Supplier, objs)
+    return len(objs), []
+
+
+def _upsert_products(rows, columns):
+    # Resolve supplier names for the whole chunk with a single query.
+    names = {values["SupplierName"] for _, values in rows if values["SupplierName"]}
+    suppliers = dict(
+        Supplier.objects.filter(SupplierName__in=names).values_list("SupplierName", "SupplierId")
+    )
+
+    objs = {}
+    errors = []
+    for line, values in rows:
+        values = dict(values)
+        name = values.pop("SupplierName")
+        if name and name not in suppliers:
+            errors.append((line, f"Unknown supplier {name!r}."))
+            continue
+        # A later row for the same product wins.
+        objs[values["ProductId"]] = Product(SupplierId_id=suppliers.get(name), **values)
+    objs = list(objs.values())
+
+    update_fields = ["ProductName", "Category", "Price", "StockLevel", "ReorderLevel"]
+    if "LastPurchaseDate" in columns:
+        update_fields.append("LastPurchaseDate")
+    if "SupplierName" in columns:
+        update_fields.append("SupplierId")
+    Product.objects.bulk_create(
+        objs,
+        update_conflicts=True,
+        unique_fields=["ProductId"],
+        update_fields=update_fields,
+    )
+    _invalidate(Product, objs)
+    index_products(objs)
+    return len(objs), errors
+
+
+def _upsert_stock(rows, columns):
+    # Resolve store names and check product ids for the whole chunk at once.
+    stores = dict(
+        Store.objects.filter(
+            StoreName__in={values["StoreName"] for _, values in rows}
+        ).values_list("StoreName", "StoreId")
+    )
+    products = set(
+        Product.objects.filter(
+            ProductId__in={values["ProductId"] for _, values in rows}
+        ).values_list("ProductId", flat=True)
+    )
+
+    targets = {}
+    errors = []
+    for line, values in rows:
+        if values["StoreName"] not in stores:
+            errors.append((line, f"Unknown store {values['StoreName']!r}."))
+        elif values["ProductId"] not in products:
+            errors.append((line, f"Unknown product {values['ProductId']}."))
+        else:
+            # A later row for the same product and store wins.
+            targets[values["ProductId"], stores[values["StoreName"]]] = values["Quantity"]
+
+    # Quantities are counted stock, so record the difference from the current level
+    # in the ledger: a receipt for opening stock, an adjustment otherwise.
+    levels = current_levels(
+        product_ids={product for product, _ in targets},
+        store_ids={store for _, store in targets},
+    )
+    record_movements(
+        StockMovement(
+            ProductId_id=product,
+            StoreId_id=store,
+            Kind=StockMovement.ADJUSTMENT if (product, store) in levels else StockMovement.RECEIPT,
+            Quantity=quantity - levels.get((product, store), 0),
+            Reference="Catalogue import",
+        )
+        for (product, store), quantity in targets.items()
+        if quantity != levels.get((product, store), 0)
+    )
+    return len(targets), errors
+
+
+# Kind -> upsert(cleaned rows, column names of the file), returning
+# (rows written, list of (line number, error message)).
+UPSERTS = {
+    "suppliers": _upsert_suppliers,
+    "products": _upsert_products,
+    "stock": _upsert_stock,
+}
+
+
+class CatalogueImport:
+    """
+    Streams a CSV file into the database in chunks.
+    Chunks are validated in a process pool while earlier chunks are being written,
+    and every written chunk is recorded in a checkpoint file so an interrupted
+    import can be resumed where it stopped.
+    """
+
+    def __init__(
+        self,
+        kind,
+        path,
+        chunk_size=DEFAULT_CHUNK_SIZE,
+        workers=None,
+        checkpoint_path=None,
+        progress=None,
+    ):
+        if kind not in COLUMNS:
+            raise CatalogueImportError(f"Unknown import kind {kind!r}.")
+        self.kind = kind
+        self.path = str(path)
+        self.chunk_size = chunk_size
+        self.workers = min(4, os.cpu_count() or 1) if workers is None else workers
+        self.checkpoint_path = checkpoint_path or f"{self.path}.checkpoint.json"
+        self.progress = progress
+        self.state = self._load_checkpoint()
+
+    def _file_identity(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def _load_checkpoint(self):
+        fresh = {
+            "kind": self.kind,
+            "path": self.path,
+            "file": self._file_identity(),
+            "status": "running",
+            "rows_done": 0,
+            "imported": 0,
+            "error_count": 0,
+            "errors": [],
+        }
+        if not os.path.exists(self.checkpoint_path):
+            return fresh
+        with open(self.checkpoint_path) as f:
+            state = json.load(f)
+        # Only resume an unfinished run over the very same file; a rewritten file
+        # or a finished run starts over.
+        if (
+            state.get("kind") != self.kind
+            or state.get("path") != self.path
+            or state.get("file") != fresh["file"]
+            or state.get("status") == "done"
+        ):
+            return fresh
+        state["status"] = "running"
+        return state
+
+    def _save_checkpoint(self):
+        temp_path = f"{self.checkpoint_path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.state, f)
+        os.replace(temp_path, self.checkpoint_path)
+
+    def _chunks(self, reader):
+        # Line 1 is the header, so data rows start at line 2.
+        rows = enumerate(reader, start=2)
+        skip = self.state["rows_done"]
+        if skip:
+            for _ in islice(rows, skip):
+                pass
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    def _validated(self, chunks):
+        if not self.workers:
+            for chunk in chunks:
+                yield len(chunk), validate_chunk(self.kind, chunk)
+            return
+
+        # Keep a bounded number of chunks in flight so memory does not grow with the file.
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append((len(chunk), pool.submit(validate_chunk, self.kind, chunk)))
+                if len(pending) >= self.workers * 2:
+                    size, future = pending.popleft()
+                    yield size, future.result()
+            while pending:
+                size, future = pending.popleft()
+                yield size, future.result()
+
+    def run(self):
+        """
+        Runs (or resumes) the import.
+        return: The final checkpoint state with row, import and error counts.
+        """
+        upsert = UPSERTS[self.kind]
+
+        try:
+            with open(self.path, newline="", encoding="utf-8-sig") as f:
+                reader = csv.DictReader(f)
+                columns = set(reader.fieldnames or [])
+                missing = [c for c in COLUMNS[self.kind] if c not in columns]
+                if missing:
+                    raise CatalogueImportError(f"Missing columns: {', '.join(missing)}.")
+
+                for size, (cleaned, errors) in self._validated(self._chunks(reader)):
+                    with transaction.atomic():
+                        imported, write_errors = upsert(cleaned, columns) if cleaned else (0, [])
+
+                    self.state["rows_done"] += size
+                    self.state["imported"] += imported
+                    errors = errors + write_errors
+                    self.state["error_count"] += len(errors)
+                    room = MAX_REPORTED_ERRORS - len(self.state["errors"])
+                    self.state["errors"].extend(errors[: max(room, 0)])
+                    self._save_checkpoint()
+
+                    if self.progress:
+                        self.progress(self.state)
+        except Exception as e:
+            self.state["status"] = "failed"
+            self.state["failure"] = str(e)
+            self._save_checkpoint()
+            raise
+
+        self._reset_sequences()
+        self.state["status"] = "done"
+        self._save_checkpoint()
+        return self.state
+
+    def _reset_sequences(self):
+        # Suppliers and products are upserted with explicit primary keys, which
+        # leaves sequences (e.g. on PostgreSQL) behind the highest imported ID.
+        model = {"suppliers": Supplier, "products": Product}.get(self.kind)
+        if model is None:
+            return
+        connection = connections[router.db_for_write(model)]
+        statements = connection.ops.sequence_reset_sql(no_style(), [model])
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
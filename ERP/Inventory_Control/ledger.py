@@ -0,0 +1,260 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, F, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from Inventory_Control.models import StockLocation, StockMovement, StockSnapshot
+
+
+def ledger_watermark():
+    """
+    Returns the ID of the last movement folded into StockLocation by compaction.
+    Movements after it make up the uncompacted ledger tail.
+    """
+    return StockSnapshot.objects.aggregate(Top=Max("LastMovementId"))["Top"] or 0
+
+
+def watermark_expression():
+    """
+    Returns ledger_watermark() as a subquery, so callers can filter the tail in the
+    same query instead of fetching the watermark first.
+    """
+    return Coalesce(
+        Subquery(
+            StockSnapshot.objects.order_by("-LastMovementId").values("LastMovementId")[:1]
+        ),
+        Value(0),
+    )
+
+
+def _filtered(queryset, product_ids=None, store_ids=None):
+    if product_ids is not None:
+        queryset = queryset.filter(ProductId__in=product_ids)
+    if store_ids is not None:
+        queryset = queryset.filter(StoreId__in=store_ids)
+    return queryset
+
+
+def _movement_totals(queryset):
+    return {
+        (row["ProductId"], row["StoreId"]): row["Total"]
+        for row in queryset.values("ProductId", "StoreId")
+        .annotate(Total=Sum("Quantity"))
+        .order_by()
+    }
+
+
+def _located_and_pending(product_ids=None, store_ids=None, fields=("ProductId", "StoreId")):
+    # StockLocation and the ledger tail are read in one UNION ALL statement, so a
+    # compaction committing in between cannot count movements twice or not at all.
+    located = _filtered(StockLocation.objects.all(), product_ids, store_ids)
+    pending = _filtered(
+        StockMovement.objects.filter(MovementId__gt=watermark_expression()),
+        product_ids,
+        store_ids,
+    )
+    return (
+        queryset.values(*fields).annotate(Total=Sum("Quantity")).order_by().values_list(*fields, "Total")
+        for queryset in (located, pending)
+    )
+
+
+def current_levels(product_ids=None, store_ids=None):
+    """
+    Returns the current stock per (ProductId, StoreId): the compacted StockLocation
+    quantity plus every movement recorded since the last compaction, read with a
+    single query.
+    product_ids: Optional iterable of product IDs to restrict the result to.
+    store_ids: Optional iterable of store IDs to restrict the result to.
+    """
+    located, pending = _located_and_pending(product_ids, store_ids)
+    levels = {}
+    for product, store, total in located.union(pending, all=True):
+        levels[product, store] = levels.get((product, store), 0) + (total or 0)
+    return levels
+
+
+def product_levels(product_ids):
+    """
+    Returns the current total stock per product across all stores, with a single
+    grouped query over StockLocation and the ledger tail for all products at once.
+    product_ids: Iterable of product IDs.
+    """
+    product_ids = list(product_ids)
+    levels = dict.fromkeys(product_ids, 0)
+    located, pending = _located_and_pending(product_ids, fields=("ProductId",))
+    for product, total in located.union(pending, all=True):
+        levels[product] += total or 0
+    return levels
+
+
+def stock_level_expression():
+    """
+    Returns an expression for Product.GetStockLevel(), so product querysets can be
+    annotated or filtered on current stock in the same query.
+    """
+    located = (
+        StockLocation.objects.filter(ProductId=OuterRef("pk"))
+        .values("ProductId")
+        .annotate(Total=Sum("Quantity"))
+        .values("Total")
+    )
+    pending = (
+        StockMovement.objects.filter(
+            ProductId=OuterRef("pk"), MovementId__gt=watermark_expression()
+        )
+        .values("ProductId")
+        .annotate(Total=Sum("Quantity"))
+        .values("Total")
+    )
+    return Coalesce(Subquery(located), Value(0)) + Coalesce(Subquery(pending), Value(0))
+
+
+def location_level_expression():
+    """
+    Returns an expression for StockLocation.GetCurrentQuantity(), so location
+    querysets can be annotated with current stock in the same query.
+    """
+    pending = (
+        StockMovement.objects.filter(
+            ProductId=OuterRef("ProductId"),
+            StoreId=OuterRef("StoreId"),
+            MovementId__gt=watermark_expression(),
+        )
+        .values("ProductId")
+        .annotate(Total=Sum("Quantity"))
+        .values("Total")
+    )
+    return F("Quantity") + Coalesce(Subquery(pending), Value(0))
+
+
+def record_movements(movements):
+    """
+    Appends movements to the ledger with a single insert.
+    movements: Iterable of unsaved StockMovement instances.
+    """
+    return StockMovement.objects.bulk_create(list(movements))
+
+
+def compact(lag=None):
+    """
+    Folds the ledger tail into StockLocation and records a snapshot for every
+    location that changed. Locations without any snapshot yet get a baseline one,
+    so point-in-time queries also cover opening stock.
+    Only movements older than the lag are compacted, so slow in-flight transactions
+    with lower movement IDs are not skipped.
+    lag: Seconds to leave uncompacted (defaults to settings.LEDGER_COMPACTION_LAG).
+    return: Number of snapshots written.
+    """
+    lag = getattr(settings, "LEDGER_COMPACTION_LAG", 60) if lag is None else lag
+    now = timezone.now()
+
+    with transaction.atomic():
+        watermark = ledger_watermark()
+        upto = (
+            StockMovement.objects.filter(
+                MovementId__gt=watermark, Timestamp__lte=now - timedelta(seconds=lag)
+            ).aggregate(Top=Max("MovementId"))["Top"]
+            or watermark
+        )
+
+        deltas = _movement_totals(
+            StockMovement.objects.filter(MovementId__gt=watermark, MovementId__lte=upto)
+        )
+
+        snapshots = []
+        if deltas:
+            existing = {
+                (product, store): quantity
+                for product, store, quantity in StockLocation.objects.filter(
+                    ProductId__in={product for product, _ in deltas},
+                    StoreId__in={store for _, store in deltas},
+                ).values_list("ProductId", "StoreId", "Quantity")
+            }
+            locations = []
+            for (product, store), delta in deltas.items():
+                quantity = existing.get((product, store), 0) + delta
+                locations.append(
+                    StockLocation(ProductId_id=product, StoreId_id=store, Quantity=quantity)
+                )
+                snapshots.append(
+                    StockSnapshot(
+                        ProductId_id=product,
+                        StoreId_id=store,
+                        Quantity=quantity,
+                        TakenAt=now,
+                        LastMovementId=upto,
+                    )
+                )
+            StockLocation.objects.bulk_create(
+                locations,
+                update_conflicts=True,
+                unique_fields=["ProductId", "StoreId"],
+                update_fields=["Quantity"],
+            )
+
+        unsnapshotted = StockLocation.objects.exclude(
+            Exists(
+                StockSnapshot.objects.filter(
+                    ProductId=OuterRef("ProductId"), StoreId=OuterRef("StoreId")
+                )
+            )
+        )
+        changed = set(deltas)
+        snapshots.extend(
+            StockSnapshot(
+                ProductId_id=product,
+                StoreId_id=store,
+                Quantity=quantity,
+                TakenAt=now,
+                LastMovementId=upto,
+            )
+            for product, store, quantity in unsnapshotted.values_list(
+                "ProductId", "StoreId", "Quantity"
+            ).iterator()
+            if (product, store) not in changed
+        )
+
+        StockSnapshot.objects.bulk_create(snapshots, batch_size=5000)
+        return len(snapshots)
+
+
+def stock_at(when, product_ids=None, store_ids=None):
+    """
+    Rebuilds stock per (ProductId, StoreId) as it was at a point in time, from the
+    latest snapshot of each location taken at or before it plus the ledger movements
+    recorded after the last compaction before that time.
+    Each compaction snapshots every location it changes, so a location's latest
+    snapshot is current as of that compaction and only the tail after it is replayed.
+    when: Datetime (or date, meaning the end of that day) to rebuild stock for.
+    """
+    if not isinstance(when, datetime):
+        when = timezone.make_aware(datetime.combine(when, time.max))
+
+    snapshots = StockSnapshot.objects.filter(TakenAt__lte=when)
+    watermark = snapshots.aggregate(Top=Max("LastMovementId"))["Top"] or 0
+
+    latest = (
+        _filtered(snapshots, product_ids, store_ids)
+        .values("ProductId", "StoreId")
+        .annotate(Latest=Max("SnapshotId"))
+        .values("Latest")
+    )
+    levels = {
+        (product, store): quantity
+        for product, store, quantity in StockSnapshot.objects.filter(
+            SnapshotId__in=latest
+        ).values_list("ProductId", "StoreId", "Quantity")
+    }
+
+    tail = _filtered(
+        StockMovement.objects.filter(MovementId__gt=watermark, Timestamp__lte=when),
+        product_ids,
+        store_ids,
+    )
+    for key, total in _movement_totals(tail).items():
+        levels[key] = levels.get(key, 0) + total
+    return levels
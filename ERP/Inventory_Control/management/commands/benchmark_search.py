@@ -0,0 +1,80 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from Inventory_Control.models import Product
+from Inventory_Control.search import get_backend, search_products, tokenize
+
+
+class Command(BaseCommand):
+    help = "Compares product search latency against icontains filtering."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "queries", nargs="*", help="Queries to run (defaults to words sampled from product names)."
+        )
+        parser.add_argument("--samples", type=int, default=20, help="Queries to sample.")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per query.")
+        parser.add_argument("--page-size", type=int, default=20)
+
+    def _sample_queries(self, samples):
+        count = Product.objects.count()
+        if not count:
+            raise CommandError("There are no products to benchmark against.")
+        queries = []
+        for offset in random.sample(range(count), min(samples, count)):
+            name = Product.objects.order_by("pk").values_list("ProductName", flat=True)[offset]
+            terms = tokenize(name)
+            if terms:
+                # Prefixes exercise partial matching the same way for both approaches.
+                term = random.choice(terms)
+                queries.append(term[: max(3, len(term) - 2)])
+        return queries
+
+    def _time(self, fn, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = fn()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings), result
+
+    def handle(self, *args, **options):
+        queries = options["queries"] or self._sample_queries(options["samples"])
+        page_size = options["page_size"]
+        repeat = options["repeat"]
+
+        backend = get_backend()
+        if backend.name == "memory":
+            # Build the in-process index before timing; FTS5 tables come from migrations.
+            backend.ensure()
+        self.stdout.write(f"Search backend: {backend.name}\n")
+
+        def naive(query):
+            condition = Q()
+            for term in query.split():
+                condition &= Q(ProductName__icontains=term) | Q(Category__icontains=term)
+            matches = Product.objects.filter(condition)
+            return matches.count(), list(matches.order_by("ProductName")[:page_size])
+
+        self.stdout.write(f"{'query':<24} {'icontains ms':>13} {'hits':>7} {'search ms':>10} {'hits':>7}")
+        naive_total = []
+        search_total = []
+        for query in queries:
+            naive_ms, (naive_hits, _) = self._time(lambda: naive(query), repeat)
+            search_ms, result = self._time(
+                lambda: search_products(query, page_size=page_size), repeat
+            )
+            naive_total.append(naive_ms)
+            search_total.append(search_ms)
+            self.stdout.write(
+                f"{query[:24]:<24} {naive_ms:>13.2f} {naive_hits:>7} {search_ms:>10.2f} {result['Total']:>7}"
+            )
+
+        self.stdout.write(
+            f"\nMedian over {len(queries)} queries: icontains {statistics.median(naive_total):.2f} ms, "
+            f"search {statistics.median(search_total):.2f} ms"
+        )
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from Inventory_Control.ledger import compact
+
+
+class Command(BaseCommand):
+    help = (
+        "Folds recent stock ledger movements into StockLocation and records snapshots. "
+        "Run periodically (e.g. from cron) to keep point-in-time queries cheap."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lag",
+            type=int,
+            default=None,
+            help="Seconds of recent movements to leave uncompacted (default: LEDGER_COMPACTION_LAG).",
+        )
+
+    def handle(self, *args, **options):
+        written = compact(lag=options["lag"])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} stock snapshot(s)."))
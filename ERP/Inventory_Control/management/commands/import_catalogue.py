@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from Inventory_Control.importer import (
+    COLUMNS,
+    DEFAULT_CHUNK_SIZE,
+    CatalogueImport,
+    CatalogueImportError,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk imports suppliers, products or opening stock from a CSV file. "
+        "Re-running the same command resumes from the last checkpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(COLUMNS))
+        parser.add_argument("path", help="CSV file with a header row.")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Validation worker processes (0 validates in this process).",
+        )
+        parser.add_argument("--checkpoint", help="Checkpoint file (default: <path>.checkpoint.json).")
+
+    def handle(self, *args, **options):
+        def progress(state):
+            self.stdout.write(
+                f"{state['rows_done']} rows read, {state['imported']} imported, "
+                f"{state['error_count']} errors"
+            )
+
+        try:
+            state = CatalogueImport(
+                options["kind"],
+                options["path"],
+                chunk_size=options["chunk_size"],
+                workers=options["workers"],
+                checkpoint_path=options["checkpoint"],
+                progress=progress,
+            ).run()
+        except (CatalogueImportError, OSError) as e:
+            raise CommandError(str(e))
+
+        for line, message in state["errors"]:
+            self.stderr.write(f"Line {line}: {message}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {state['imported']} {options['kind']} rows "
+                f"({state['error_count']} rejected)."
+            )
+        )
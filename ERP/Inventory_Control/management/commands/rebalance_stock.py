@@ -0,0 +1,48 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from Inventory_Control.rebalancing import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_COVER_DAYS,
+    DEFAULT_DEMAND_DAYS,
+    build_plan,
+)
+
+
+class Command(BaseCommand):
+    help = "Plans stock transfers between stores and purchases for what they cannot cover."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cover-days", type=int, default=DEFAULT_COVER_DAYS)
+        parser.add_argument("--demand-days", type=int, default=DEFAULT_DEMAND_DAYS)
+        parser.add_argument("--workers", type=int, help="Worker processes (0 plans inline).")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument("--apply", action="store_true", help="Carry out the plan.")
+        parser.add_argument("--json", action="store_true", help="Print the full plan as JSON.")
+
+    def handle(self, *args, **options):
+        plan = build_plan(
+            cover_days=options["cover_days"],
+            demand_days=options["demand_days"],
+            workers=options["workers"],
+            chunk_size=options["chunk_size"],
+        )
+
+        if options["json"]:
+            self.stdout.write(json.dumps(plan.as_dict(), indent=2))
+        else:
+            summary = plan.summary()
+            self.stdout.write(
+                f"Plan {summary['PlanId']}: {summary['Transfers']} transfer(s) moving "
+                f"{summary['UnitsTransferred']} unit(s), {summary['Purchases']} purchase(s) of "
+                f"{summary['UnitsPurchased']} unit(s) worth {summary['PurchaseAmount']}."
+            )
+
+        if options["apply"]:
+            outcome = plan.apply()
+            self.stdout.write(
+                f"Applied: {outcome['Transfers']} transfer(s) recorded "
+                f"({outcome['SkippedTransfers']} skipped), {outcome['PurchaseOrders']} purchase "
+                f"order(s) created ({outcome['SkippedPurchases']} already pending)."
+            )
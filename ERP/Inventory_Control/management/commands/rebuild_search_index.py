@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from Inventory_Control.search import get_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the product search index from the Product table."
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        count = backend.rebuild()
+        self.stdout.write(f"Indexed {count} product(s) with the {backend.name} backend.")
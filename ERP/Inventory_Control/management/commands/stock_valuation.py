@@ -0,0 +1,42 @@
+import json
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from Inventory_Control.reports import DEFAULT_CHUNK_SIZE, build_stock_valuation
+
+
+class Command(BaseCommand):
+    help = "Reports stock value by store and category, with inventory aging buckets."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--as-of", help="Date to value and age stock at (YYYY-MM-DD).")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument("--json", action="store_true", help="Print the raw report as JSON.")
+
+    def handle(self, *args, **options):
+        try:
+            as_of = date.fromisoformat(options["as_of"]) if options["as_of"] else None
+        except ValueError:
+            raise CommandError("--as-of must be a date (YYYY-MM-DD).")
+
+        report = build_stock_valuation(as_of=as_of, chunk_size=options["chunk_size"])
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, cls=DjangoJSONEncoder, indent=2))
+            return
+
+        self.stdout.write(
+            f"Stock valuation as of {report['AsOf']}: "
+            f"{report['TotalQuantity']} units, value {report['TotalValue']}"
+        )
+        self.stdout.write("\nBy store:")
+        for row in report["ByStore"]:
+            self.stdout.write(f"  {row['StoreName']:<30} {row['Quantity']:>12} {row['Value']:>16}")
+        self.stdout.write("\nBy category:")
+        for row in report["ByCategory"]:
+            self.stdout.write(f"  {row['Category']:<30} {row['Quantity']:>12} {row['Value']:>16}")
+        self.stdout.write("\nAging (days):")
+        for row in report["Aging"]:
+            self.stdout.write(f"  {row['Bucket']:<30} {row['Quantity']:>12} {row['Value']:>16}")
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 17:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Inventory_Control', '0003_alter_stocklocation_date'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='stocklocation',
+            constraint=models.UniqueConstraint(fields=('ProductId', 'StoreId'), name='unique_stock_location'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.30 on 2026-10-19 17:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Inventory_Control', '0004_stocklocation_unique_stock_location'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('SnapshotId', models.BigAutoField(primary_key=True, serialize=False, unique=True)),
+                ('Quantity', models.IntegerField()),
+                ('TakenAt', models.DateTimeField(db_index=True)),
+                ('LastMovementId', models.BigIntegerField(db_index=True)),
+                ('ProductId', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='Inventory_Control.product')),
+                ('StoreId', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='Inventory_Control.store')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ProductId', 'StoreId', 'TakenAt'], name='Inventory_C_Product_f509de_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('MovementId', models.BigAutoField(primary_key=True, serialize=False, unique=True)),
+                ('Kind', models.CharField(choices=[('Sale', 'Sale'), ('Transfer', 'Transfer'), ('Receipt', 'Receipt'), ('Adjustment', 'Adjustment')], max_length=20)),
+                ('Quantity', models.IntegerField()),
+                ('Timestamp', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('Reference', models.CharField(blank=True, max_length=200)),
+                ('ProductId', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='Inventory_Control.product')),
+                ('StoreId', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='Inventory_Control.store')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ProductId', 'StoreId', 'MovementId'], name='Inventory_C_Product_dc5c1d_idx')],
+            },
+        ),
+    ]
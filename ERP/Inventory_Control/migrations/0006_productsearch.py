@@ -0,0 +1,48 @@
+from django.db import migrations
+
+
+class Fts5SQL(migrations.RunSQL):
+    """
+    RunSQL that only runs on SQLite builds with FTS5; other databases use the
+    in-process search backend and need no table.
+    """
+
+    @staticmethod
+    def _supported(connection):
+        if connection.vendor != "sqlite":
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA compile_options")
+            return any(row[0] == "ENABLE_FTS5" for row in cursor.fetchall())
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if self._supported(schema_editor.connection):
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if self._supported(schema_editor.connection):
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Inventory_Control', '0005_stocksnapshot_stockmovement'),
+    ]
+
+    operations = [
+        Fts5SQL(
+            sql=[
+                'CREATE VIRTUAL TABLE "Inventory_Control_productsearch" USING fts5('
+                '"ProductName", "Category", tokenize = "unicode61 remove_diacritics 2")',
+                'CREATE VIRTUAL TABLE "Inventory_Control_productsearch_vocab" '
+                'USING fts5vocab("Inventory_Control_productsearch", "row")',
+                'INSERT INTO "Inventory_Control_productsearch" (rowid, "ProductName", "Category") '
+                'SELECT "ProductId", "ProductName", "Category" FROM "Inventory_Control_product"',
+            ],
+            reverse_sql=[
+                'DROP TABLE "Inventory_Control_productsearch_vocab"',
+                'DROP TABLE "Inventory_Control_productsearch"',
+            ],
+        ),
+    ]
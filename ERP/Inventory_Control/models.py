@@ -1,7 +1,11 @@
 from django.db import models
 from django.core.exceptions import ValidationError
-from django.db.models import Sum, Avg
+from django.db.models import Avg
+from django.db import transaction
+from django.utils import timezone
 from datetime import datetime, timedelta
+from ERP.profiling import traced
+from ERP.reference_cache import get_related
 
 
 class Product(models.Model):
@@ -28,43 +32,77 @@ class Product(models.Model):
         """
         Returns all stores that stock this product.
         """
-        return self.stocklocation_set.values("StoreId__StoreName", "StoreId__Location")
+        return self.stocklocation.values("StoreId__StoreName", "StoreId__Location")
 
+    @traced()
     def GetStockLevel(self):
         """
-        Returns the total stock level for this product across all stores.
+        Returns the total stock level for this product across all stores, including
+        ledger movements not yet compacted into StockLocation.
         """
+        from Inventory_Control.ledger import stock_level_expression
+
+        # One query, so a concurrent compaction cannot be counted twice or missed.
         return (
-            self.stocklocation_set.aggregate(TotalStock=Sum("Quantity"))["TotalStock"]
+            Product.objects.filter(pk=self.pk)
+            .annotate(TotalStock=stock_level_expression())
+            .values_list("TotalStock", flat=True)
+            .first()
             or 0
         )
 
+    @traced()
+    def GetStockLevelAt(self, when):
+        """
+        Returns the total stock level for this product across all stores at a past
+        point in time, rebuilt from the nearest snapshot and the ledger.
+        when: Datetime or date to rebuild the stock level for.
+        """
+        from Inventory_Control.ledger import stock_at
+
+        return sum(stock_at(when, product_ids=[self.ProductId]).values())
+
+    @traced()
     def TransferStock(self, from_store, to_store, quantity):
         """
-        Transfers stock of this product between stores.
+        Transfers stock of this product between stores by appending a pair of
+        transfer movements to the stock ledger.
         from_store: Store instance to transfer from.
         to_store: Store instance to transfer to.
         quantity: Quantity of stock to transfer.
         """
+        from Inventory_Control.ledger import current_levels, record_movements
+
         if quantity <= 0:
             raise ValueError("Quantity must be greater than zero.")
 
-        from_stock = self.stocklocation.filter(StoreId=from_store).first()
-        to_stock = self.stocklocation.filter(StoreId=to_store).first()
+        available = current_levels(
+            product_ids=[self.ProductId], store_ids=[from_store.StoreId]
+        ).get((self.ProductId, from_store.StoreId), 0)
 
-        if not from_stock or from_stock.Quantity < quantity:
+        if available < quantity:
             raise ValidationError("Insufficient stock in the source store.")
 
-        from_stock.Quantity -= quantity
-        from_stock.save()
-
-        if to_stock:
-            to_stock.Quantity += quantity
-        else:
-            StockLocation.objects.create(
-                ProductId=self, StoreId=to_store, Quantity=quantity
+        reference = f"Transfer {from_store.StoreId} -> {to_store.StoreId}"
+        with transaction.atomic():
+            record_movements(
+                [
+                    StockMovement(
+                        ProductId=self,
+                        StoreId=from_store,
+                        Kind=StockMovement.TRANSFER,
+                        Quantity=-quantity,
+                        Reference=reference,
+                    ),
+                    StockMovement(
+                        ProductId=self,
+                        StoreId=to_store,
+                        Kind=StockMovement.TRANSFER,
+                        Quantity=quantity,
+                        Reference=reference,
+                    ),
+                ]
             )
-        to_stock.save()
 
     def EditReorderLevel(self, new_reorder_level):
         """
@@ -83,7 +121,7 @@ class Store(models.Model):
     Location = models.CharField(max_length=200)
     ContactNumber = models.CharField(max_length=15)
     ManagerId = models.OneToOneField(
-        "HR.Staff",
+        "Human_Resources.Staff",
         null=True,
         on_delete=models.SET_NULL,
     )
@@ -95,10 +133,23 @@ class Store(models.Model):
 
     def GetAllProducts(self):
         """
-        Returns all products stocked in this store.
+        Returns all products stocked in this store with their current quantity,
+        including ledger movements not yet compacted into StockLocation.
         """
-        return self.stocklocation_set.values("ProductId__ProductName", "Quantity")
+        from Inventory_Control.ledger import current_levels
 
+        levels = current_levels(store_ids=[self.pk])
+        names = dict(
+            Product.objects.filter(pk__in=[product for product, _ in levels]).values_list(
+                "ProductId", "ProductName"
+            )
+        )
+        return [
+            {"ProductId__ProductName": names[product], "Quantity": quantity}
+            for (product, _), quantity in sorted(levels.items())
+        ]
+
+    @traced()
     def ViewStorePerformance(self):
         """
         Returns the store's performance metrics.
@@ -163,17 +214,109 @@ class StockLocation(models.Model):
         Store, on_delete=models.CASCADE, related_name="stocklocation"
     )
     Quantity = models.IntegerField()
-    Date = models.DateTimeField(auto_now_add=True)
+    Date = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ProductId", "StoreId"], name="unique_stock_location"
+            )
+        ]
 
     def __str__(self):
-        return f"{self.ProductId.ProductName} - {self.StoreId.StoreName} - Amount: {self.Quantity}"
+        # Querysets annotated with ledger.location_level_expression() as Current
+        # (e.g. the admin changelist) save a query per location.
+        quantity = getattr(self, "Current", None)
+        if quantity is None:
+            quantity = self.GetCurrentQuantity()
+        return f"{get_related(self, 'ProductId').ProductName} - {get_related(self, 'StoreId').StoreName} - Amount: {quantity}"
+
+    def GetCurrentQuantity(self):
+        """
+        Returns the quantity at this location including ledger movements not yet
+        compacted into Quantity.
+        """
+        from Inventory_Control.ledger import current_levels
+
+        return current_levels(
+            product_ids=[self.ProductId_id], store_ids=[self.StoreId_id]
+        ).get((self.ProductId_id, self.StoreId_id), 0)
 
-    def AdjustStock(self, quantity):
+    @traced()
+    def AdjustStock(self, quantity, kind=None, reference=""):
         """
-        Adjusts the stock quantity for this stock location.
+        Adjusts the stock quantity for this stock location by appending a movement
+        to the stock ledger. Quantity itself is only rewritten by compaction.
         quantity: Positive to increase stock, negative to decrease stock.
+        kind: Movement kind (defaults to an adjustment).
+        reference: Optional free-text reference, e.g. a sale or delivery ID.
         """
-        if self.Quantity + quantity < 0:
+        if self.GetCurrentQuantity() + quantity < 0:
             raise ValidationError("Insufficient stock for the operation.")
-        self.Quantity += quantity
-        self.save()
+        return StockMovement.objects.create(
+            ProductId_id=self.ProductId_id,
+            StoreId_id=self.StoreId_id,
+            Kind=kind or StockMovement.ADJUSTMENT,
+            Quantity=quantity,
+            Reference=reference,
+        )
+
+
+class StockMovement(models.Model):
+    """
+    Append-only stock ledger. Rows are never updated; compaction folds them into
+    StockLocation and StockSnapshot.
+    """
+
+    SALE = "Sale"
+    TRANSFER = "Transfer"
+    RECEIPT = "Receipt"
+    ADJUSTMENT = "Adjustment"
+    KIND_CHOICES = [
+        (SALE, "Sale"),
+        (TRANSFER, "Transfer"),
+        (RECEIPT, "Receipt"),
+        (ADJUSTMENT, "Adjustment"),
+    ]
+
+    MovementId = models.BigAutoField(primary_key=True, unique=True)
+    ProductId = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="movements"
+    )
+    StoreId = models.ForeignKey(
+        Store, on_delete=models.CASCADE, related_name="movements"
+    )
+    Kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    Quantity = models.IntegerField()
+    Timestamp = models.DateTimeField(default=timezone.now, db_index=True)
+    Reference = models.CharField(max_length=200, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["ProductId", "StoreId", "MovementId"])]
+
+    def __str__(self):
+        return f"{self.Kind} {self.Quantity:+} - Product:{self.ProductId_id} Store:{self.StoreId_id}"
+
+
+class StockSnapshot(models.Model):
+    """
+    Stock of one location as of a compaction, including every movement up to
+    LastMovementId.
+    """
+
+    SnapshotId = models.BigAutoField(primary_key=True, unique=True)
+    ProductId = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="snapshots"
+    )
+    StoreId = models.ForeignKey(
+        Store, on_delete=models.CASCADE, related_name="snapshots"
+    )
+    Quantity = models.IntegerField()
+    TakenAt = models.DateTimeField(db_index=True)
+    LastMovementId = models.BigIntegerField(db_index=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["ProductId", "StoreId", "TakenAt"])]
+
+    def __str__(self):
+        return f"Product:{self.ProductId_id} Store:{self.StoreId_id} - {self.Quantity} at {self.TakenAt}"
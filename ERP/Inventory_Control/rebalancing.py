@@ -0,0 +1,300 @@
+import math
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+import numpy as np
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from Inventory_Control.ledger import current_levels, record_movements
+from Inventory_Control.models import Product, StockMovement, Store
+from Procurement.models import PurchaseOrder
+from Sales.partitions import sales_totals
+
+
+# Days of recent sales used to estimate daily demand per store.
+DEFAULT_DEMAND_DAYS = 30
+
+# Days of demand every store should hold after rebalancing.
+DEFAULT_COVER_DAYS = 14
+
+# Products planned per worker task.
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def load_matrices(demand_days=DEFAULT_DEMAND_DAYS, today=None):
+    """
+    Loads the product x store stock and demand matrices.
+    demand_days: Days of sales to average daily demand over.
+    return: (product_ids, store_ids, reorder levels, prices, stock, daily demand)
+            where stock and demand are arrays of shape (products, stores).
+    """
+    products = np.array(
+        list(Product.objects.order_by("ProductId").values_list("ProductId", "ReorderLevel", "Price")),
+        dtype=object,
+    ).reshape(-1, 3)
+    product_ids = products[:, 0].astype(np.int64)
+    reorder = products[:, 1].astype(np.int64)
+    prices = products[:, 2].astype(np.float64)
+    store_ids = np.array(
+        list(Store.objects.order_by("StoreId").values_list("StoreId", flat=True)), dtype=np.int64
+    )
+
+    stock = np.zeros((len(product_ids), len(store_ids)), dtype=np.int64)
+    levels = current_levels()
+    if levels:
+        keys = np.array(list(levels), dtype=np.int64)
+        np.add.at(
+            stock,
+            (np.searchsorted(product_ids, keys[:, 0]), np.searchsorted(store_ids, keys[:, 1])),
+            np.fromiter(levels.values(), dtype=np.int64, count=len(levels)),
+        )
+
+    # Sales only record amounts, so units sold are estimated from the current price.
+    start = (today or timezone.localdate()) - timedelta(days=demand_days)
+    totals = [
+        row
+        for row in sales_totals(["ProductId", "StoreId"], start_date=start)
+        if row["ProductId"] is not None
+    ]
+    demand = np.zeros(stock.shape, dtype=np.float64)
+    if totals:
+        rows = np.searchsorted(product_ids, [row["ProductId"] for row in totals])
+        columns = np.searchsorted(store_ids, [row["StoreId"] for row in totals])
+        amounts = np.array([float(row["TotalSales"] or 0) for row in totals])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            units = np.where(prices[rows] > 0, amounts / prices[rows], 0.0)
+        np.add.at(demand, (rows, columns), units / demand_days)
+
+    return product_ids, store_ids, reorder, prices, stock, demand
+
+
+def plan_chunk(stock, target, reorder, min_transfer=1):
+    """
+    Plans transfers and purchases for a block of products. Runs in a worker process,
+    so it must not touch the database.
+    Each product moves units from stores above their target to stores below it,
+    pairing the largest surplus with the largest shortfall. There is no per-lane
+    cost data, so every unit moved costs the same and this greedy matching moves
+    the maximum possible quantity. Whatever shortfall transfers cannot cover, or
+    the gap up to the product's reorder level, is purchased.
+    stock: Array (products, stores) of current stock.
+    target: Array (products, stores) of stock each store should hold.
+    reorder: Array (products,) of reorder levels.
+    min_transfer: Smallest quantity worth a transfer.
+    return: (transfers, purchases) where transfers is an array of
+            (product row, from column, to column, quantity) and purchases an array
+            of (product row, quantity).
+    """
+    surplus = np.maximum(stock - target, 0)
+    shortfall = np.maximum(target - np.maximum(stock, 0), 0)
+
+    transfers = np.empty((0, 4), dtype=np.int64)
+    rows = np.flatnonzero((surplus.sum(axis=1) > 0) & (shortfall.sum(axis=1) > 0))
+    if len(rows):
+        width = stock.shape[1]
+        donors = np.argsort(-surplus[rows], axis=1, kind="stable")
+        receivers = np.argsort(-shortfall[rows], axis=1, kind="stable")
+        given = np.cumsum(np.take_along_axis(surplus[rows], donors, axis=1), axis=1)
+        taken = np.cumsum(np.take_along_axis(shortfall[rows], receivers, axis=1), axis=1)
+        movable = np.minimum(given[:, -1], taken[:, -1])
+
+        # Lay every product's sorted surpluses and shortfalls end to end on one axis,
+        # each product in its own disjoint range. Every segment between consecutive
+        # breakpoints of a product is then one donor -> receiver transfer, so all
+        # products are matched with one sort and two binary searches.
+        span = int(max(given[:, -1].max(), taken[:, -1].max())) + 1
+        offsets = np.arange(len(rows), dtype=np.int64) * span
+        given = (given + offsets[:, None]).ravel()
+        taken = (taken + offsets[:, None]).ravel()
+        bounds = offsets + movable
+        points = np.concatenate((offsets, given, taken))
+        limits = np.concatenate((bounds, np.repeat(bounds, width), np.repeat(bounds, width)))
+        points = np.unique(points[points <= limits])
+
+        starts, ends = points[:-1], points[1:]
+        keep = (starts // span == ends // span) & (ends - starts >= min_transfer)
+        starts, quantity = starts[keep], (ends - starts)[keep]
+        source = np.searchsorted(given, starts, side="right")
+        destination = np.searchsorted(taken, starts, side="right")
+        transfers = np.column_stack(
+            (
+                rows[source // width],
+                donors.ravel()[source],
+                receivers.ravel()[destination],
+                quantity,
+            )
+        )
+
+    moved = np.zeros(len(stock), dtype=np.int64)
+    np.add.at(moved, transfers[:, 0], transfers[:, 3])
+    uncovered = shortfall.sum(axis=1) - moved
+    below_reorder = reorder - np.maximum(stock, 0).sum(axis=1)
+    quantity = np.maximum(np.maximum(uncovered, below_reorder), 0)
+    rows = np.flatnonzero(quantity)
+    return transfers.astype(np.int64), np.column_stack((rows, quantity[rows])).astype(np.int64)
+
+
+class RebalancePlan:
+    """
+    Stock transfers between stores plus purchase orders for what transfers cannot
+    cover. Build one with build_plan and carry it out with apply.
+    """
+
+    def __init__(self, transfers, purchases, cover_days, demand_days):
+        self.id = uuid.uuid4().hex[:12]
+        self.transfers = transfers
+        self.purchases = purchases
+        self.cover_days = cover_days
+        self.demand_days = demand_days
+
+    def summary(self):
+        return {
+            "PlanId": self.id,
+            "CoverDays": self.cover_days,
+            "DemandDays": self.demand_days,
+            "Transfers": len(self.transfers),
+            "UnitsTransferred": sum(t["Quantity"] for t in self.transfers),
+            "Purchases": len(self.purchases),
+            "UnitsPurchased": sum(p["Quantity"] for p in self.purchases),
+            "PurchaseAmount": sum(p["TotalAmount"] for p in self.purchases),
+        }
+
+    def as_dict(self):
+        return {**self.summary(), "TransferList": self.transfers, "PurchaseList": self.purchases}
+
+    def apply(self):
+        """
+        Records the transfers as ledger movements with one bulk insert and creates
+        the purchase orders. Transfers whose source store no longer holds enough
+        stock are skipped, as are purchases for products that already have a
+        pending order.
+        return: Dictionary with the transfers and purchase orders created and skipped.
+        """
+        with transaction.atomic():
+            levels = current_levels(
+                product_ids={t["ProductId"] for t in self.transfers},
+                store_ids={t["FromStoreId"] for t in self.transfers},
+            )
+            reference = f"Rebalance {self.id}"
+            movements = []
+            skipped_transfers = 0
+            for t in self.transfers:
+                source = (t["ProductId"], t["FromStoreId"])
+                if levels.get(source, 0) < t["Quantity"]:
+                    skipped_transfers += 1
+                    continue
+                levels[source] -= t["Quantity"]
+                movements.extend(
+                    [
+                        StockMovement(
+                            ProductId_id=t["ProductId"],
+                            StoreId_id=t["FromStoreId"],
+                            Kind=StockMovement.TRANSFER,
+                            Quantity=-t["Quantity"],
+                            Reference=reference,
+                        ),
+                        StockMovement(
+                            ProductId_id=t["ProductId"],
+                            StoreId_id=t["ToStoreId"],
+                            Kind=StockMovement.TRANSFER,
+                            Quantity=t["Quantity"],
+                            Reference=reference,
+                        ),
+                    ]
+                )
+            record_movements(movements)
+
+            pending = set(
+                PurchaseOrder.objects.filter(
+                    ProductId__in=[p["ProductId"] for p in self.purchases],
+                    OrderStatus="Pending",
+                ).values_list("ProductId", flat=True)
+            )
+            orders = [
+                PurchaseOrder(
+                    ProductId_id=p["ProductId"],
+                    TotalAmount=p["TotalAmount"],
+                    OrderStatus="Pending",
+                )
+                for p in self.purchases
+                if p["ProductId"] not in pending
+            ]
+            # The pending-order constraint still guards against a concurrent trigger.
+            # Each order is inserted in its own savepoint, so only the orders this
+            # call actually created are counted.
+            ordered = []
+            for order in orders:
+                try:
+                    with transaction.atomic():
+                        order.save()
+                except IntegrityError:
+                    continue
+                ordered.append(order.ProductId_id)
+
+        # Drop cached TriggerPurchaseOrder results that no longer hold.
+        cache.delete_many([f"reorder-result:{product_id}" for product_id in ordered])
+        return {
+            "Transfers": len(movements) // 2,
+            "SkippedTransfers": skipped_transfers,
+            "PurchaseOrders": len(ordered),
+            "SkippedPurchases": len(self.purchases) - len(ordered),
+        }
+
+
+def build_plan(
+    cover_days=DEFAULT_COVER_DAYS,
+    demand_days=DEFAULT_DEMAND_DAYS,
+    workers=None,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    today=None,
+):
+    """
+    Plans stock transfers between stores and purchases across the catalogue.
+    Each store's target is its average daily demand times cover_days; products are
+    planned in chunks across a process pool.
+    cover_days: Days of demand every store should hold.
+    demand_days: Days of sales to average daily demand over.
+    workers: Worker processes (0 plans in this process; defaults to up to 4).
+    chunk_size: Products per worker task.
+    return: A RebalancePlan.
+    """
+    product_ids, store_ids, reorder, prices, stock, demand = load_matrices(demand_days, today)
+    target = np.ceil(demand * cover_days).astype(np.int64)
+    workers = min(4, os.cpu_count() or 1) if workers is None else workers
+
+    starts = range(0, len(product_ids), chunk_size)
+    blocks = [
+        (stock[i : i + chunk_size], target[i : i + chunk_size], reorder[i : i + chunk_size])
+        for i in starts
+    ]
+    if workers and len(blocks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(plan_chunk, *zip(*blocks)))
+    else:
+        results = [plan_chunk(*block) for block in blocks]
+
+    transfers = []
+    purchases = []
+    for offset, (chunk_transfers, chunk_purchases) in zip(starts, results):
+        transfers.extend(
+            {
+                "ProductId": int(product_ids[offset + row]),
+                "FromStoreId": int(store_ids[source]),
+                "ToStoreId": int(store_ids[destination]),
+                "Quantity": int(quantity),
+            }
+            for row, source, destination, quantity in chunk_transfers
+        )
+        purchases.extend(
+            {
+                "ProductId": int(product_ids[offset + row]),
+                "Quantity": int(quantity),
+                "TotalAmount": int(math.ceil(quantity * prices[offset + row])),
+            }
+            for row, quantity in chunk_purchases
+        )
+    return RebalancePlan(transfers, purchases, cover_days, demand_days)
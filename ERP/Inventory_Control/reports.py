@@ -0,0 +1,233 @@
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+import numpy as np
+from django.db import connections
+from django.db.models import Exists, F, Min, OuterRef, Sum
+from django.utils import timezone
+
+from ERP.reference_cache import cache_for
+from Inventory_Control.ledger import location_level_expression, stock_at, watermark_expression
+from Inventory_Control.models import StockLocation, StockMovement, Store
+
+
+# Upper bound (in days) of every aging bucket but the last, which is open ended.
+AGING_BUCKETS = (30, 60, 90, 180, 365)
+
+DEFAULT_CHUNK_SIZE = 50000
+
+
+def aging_labels(buckets=AGING_BUCKETS):
+    """
+    Returns readable labels for the aging buckets, e.g. "0-30", "31-60", "366+".
+    """
+    labels = []
+    lower = 0
+    for upper in buckets:
+        labels.append(f"{lower}-{upper}")
+        lower = upper + 1
+    labels.append(f"{lower}+")
+    return labels
+
+
+# Columns read for valuation. The SQL lists model fields before annotations, so the
+# annotations come last here too and both sides of the UNION line up.
+STOCK_COLUMNS = (
+    "ProductId",
+    "StoreId",
+    "ProductId__Category",
+    "ProductId__Price",
+    "ProductId__LastPurchaseDate",
+    "Current",
+    "Received",
+)
+
+
+def iter_stock_chunks(chunk_size=DEFAULT_CHUNK_SIZE, include_tail=True):
+    """
+    Streams the stock columns needed for valuation from one query, yielding lists of
+    (ProductId, StoreId, Category, Price, LastPurchaseDate, Quantity, Date) rows.
+    Quantities include the uncompacted ledger tail, and locations that so far only
+    have movements are dated by their first one. Reading both in the same statement
+    keeps the totals consistent while compaction runs.
+    Rows are read from a chunked (server-side where supported) cursor without the
+    ORM's per-value converters, which dominate the cost at millions of rows.
+    include_tail: False reads the compacted StockLocation quantities only.
+    """
+    tail = StockMovement.objects.filter(MovementId__gt=watermark_expression())
+    located = StockLocation.objects.annotate(
+        Current=location_level_expression() if include_tail else F("Quantity"),
+        Received=F("Date"),
+    )
+    unlocated = (
+        tail.exclude(
+            Exists(
+                StockLocation.objects.filter(
+                    ProductId=OuterRef("ProductId"), StoreId=OuterRef("StoreId")
+                )
+            )
+        )
+        .values("ProductId", "StoreId", "ProductId__Category", "ProductId__Price", "ProductId__LastPurchaseDate")
+        .annotate(Current=Sum("Quantity"), Received=Min("Timestamp"))
+    )
+    queryset = (
+        located.values_list(*STOCK_COLUMNS)
+        .order_by()
+        .union(unlocated.values_list(*STOCK_COLUMNS).order_by(), all=True)
+    )
+    sql, params = queryset.query.sql_with_params()
+
+    with connections[queryset.db].chunked_cursor() as cursor:
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+
+
+def _to_days(values):
+    """
+    Converts raw date/datetime column values (strings or objects) to datetime64[D].
+    """
+    sample = next((v for v in values if v is not None), None)
+    if isinstance(sample, datetime) and sample.tzinfo is not None:
+        values = [
+            v.astimezone(dt_timezone.utc).replace(tzinfo=None) if v is not None else None
+            for v in values
+        ]
+    return np.asarray(values, dtype="datetime64[us]").astype("datetime64[D]")
+
+
+def _grouped_sums(keys, *weights):
+    """
+    Returns the unique keys and the per-key sum of every weight array.
+    """
+    unique, inverse = np.unique(keys, return_inverse=True)
+    sums = [
+        np.rint(np.bincount(inverse, weights=w, minlength=len(unique))).astype(np.int64)
+        for w in weights
+    ]
+    return unique, sums
+
+
+def _accumulate(totals, unique, quantities, values):
+    for key, quantity, value in zip(unique.tolist(), quantities.tolist(), values.tolist()):
+        entry = totals.setdefault(key, [0, 0])
+        entry[0] += quantity
+        entry[1] += value
+
+
+def _money(cents):
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def build_stock_valuation(as_of=None, chunk_size=DEFAULT_CHUNK_SIZE, buckets=AGING_BUCKETS):
+    """
+    Computes stock value (quantity x price) by store, category and store/category,
+    plus value and quantity per aging bucket.
+    Stock age is measured from the later of StockLocation.Date and the product's
+    LastPurchaseDate. Rows are processed one chunk at a time, so memory is bounded
+    by chunk_size rather than the size of the stock table. For a past date the
+    quantities are rebuilt from the ledger with stock_at, which holds one level per
+    location in memory.
+    as_of: Date to value and age the stock at (defaults to today).
+    chunk_size: Number of stock rows converted to arrays at a time.
+    return: A dictionary of report sections.
+    """
+    today = timezone.localdate()
+    as_of = as_of or today
+    as_of_day = np.datetime64(as_of, "D")
+    levels = stock_at(as_of) if as_of < today else None
+    bin_edges = np.asarray(buckets, dtype=np.int64)
+
+    categories = {}
+    by_store = {}
+    by_category = {}
+    by_store_category = {}
+    aging_quantity = np.zeros(len(buckets) + 1, dtype=np.int64)
+    aging_value = np.zeros(len(buckets) + 1, dtype=np.float64)
+
+    for chunk in iter_stock_chunks(chunk_size, include_tail=levels is None):
+        product_ids, store_ids, category_names, prices, purchased, quantities, received = zip(
+            *chunk
+        )
+        if levels is not None:
+            quantities = [levels.get(key, 0) for key in zip(product_ids, store_ids)]
+
+        stores = np.asarray(store_ids, dtype=np.int64)
+        quantity = np.asarray(quantities, dtype=np.int64)
+        price_cents = np.rint(np.asarray(prices, dtype=np.float64) * 100).astype(np.int64)
+        value = (quantity * price_cents).astype(np.float64)
+        weights = (quantity.astype(np.float64), value)
+
+        # Map category strings to stable integer codes shared across chunks.
+        chunk_categories, category_inverse = np.unique(
+            np.asarray(category_names, dtype=object), return_inverse=True
+        )
+        codes = np.asarray(
+            [categories.setdefault(name, len(categories)) for name in chunk_categories],
+            dtype=np.int64,
+        )
+        category = codes[category_inverse]
+
+        unique, (q, v) = _grouped_sums(stores, *weights)
+        _accumulate(by_store, unique, q, v)
+
+        unique, (q, v) = _grouped_sums(category, *weights)
+        _accumulate(by_category, unique, q, v)
+
+        combined = stores * (1 << 24) + category
+        unique, (q, v) = _grouped_sums(combined, *weights)
+        _accumulate(by_store_category, unique, q, v)
+
+        # Ages are clamped at zero for stock received after a past as_of date.
+        received_day = np.fmax(_to_days(received), _to_days(purchased))
+        age = (as_of_day - received_day).astype(np.int64)
+        bucket = np.searchsorted(bin_edges, np.maximum(age, 0), side="left")
+        aging_quantity += np.rint(
+            np.bincount(bucket, weights=weights[0], minlength=len(aging_quantity))
+        ).astype(np.int64)
+        aging_value += np.bincount(bucket, weights=value, minlength=len(aging_value))
+
+    category_names = {code: name for name, code in categories.items()}
+    stores = cache_for(Store).get_many(by_store)
+
+    def store_name(store_id):
+        store = stores.get(store_id)
+        return store.StoreName if store else None
+
+    return {
+        "AsOf": as_of,
+        "TotalQuantity": sum(q for q, _ in by_store.values()),
+        "TotalValue": _money(sum(v for _, v in by_store.values())),
+        "ByStore": [
+            {
+                "StoreId": store_id,
+                "StoreName": store_name(store_id),
+                "Quantity": q,
+                "Value": _money(v),
+            }
+            for store_id, (q, v) in sorted(by_store.items())
+        ],
+        "ByCategory": [
+            {"Category": category_names[code], "Quantity": q, "Value": _money(v)}
+            for code, (q, v) in sorted(
+                by_category.items(), key=lambda item: category_names[item[0]]
+            )
+        ],
+        "ByStoreCategory": [
+            {
+                "StoreId": key >> 24,
+                "StoreName": store_name(key >> 24),
+                "Category": category_names[key & ((1 << 24) - 1)],
+                "Quantity": q,
+                "Value": _money(v),
+            }
+            for key, (q, v) in sorted(by_store_category.items())
+        ],
+        "Aging": [
+            {"Bucket": label, "Quantity": int(q), "Value": _money(np.rint(v))}
+            for label, q, v in zip(aging_labels(buckets), aging_quantity, aging_value)
+        ],
+    }
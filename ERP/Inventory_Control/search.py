@@ -0,0 +1,444 @@
+import difflib
+import heapq
+import logging
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections, router
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+
+from Inventory_Control.ledger import stock_level_expression
+from Inventory_Control.models import Product
+
+
+# Relative weight of a match in the product name versus the category.
+NAME_WEIGHT = 5.0
+CATEGORY_WEIGHT = 1.0
+
+# Vocabulary terms suggested for a query term that matches nothing.
+MAX_CORRECTIONS = 3
+CORRECTION_CUTOFF = 0.75
+
+_TOKEN = re.compile(r"[^\W_]+")
+
+logger = logging.getLogger(__name__)
+
+
+def tokenize(text):
+    """
+    Splits text into lowercase terms with diacritics removed, matching the FTS5
+    unicode61 tokenizer closely enough for both backends to agree.
+    """
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _TOKEN.findall(text.lower())
+
+
+def _prefix_range(sorted_terms, prefix):
+    start = bisect_left(sorted_terms, prefix)
+    end = bisect_left(sorted_terms, prefix + "\U0010ffff")
+    return sorted_terms[start:end]
+
+
+class Fts5Backend:
+    """
+    Product search backed by an SQLite FTS5 table over ProductName and Category,
+    ranked with bm25. The table is created by the Inventory_Control migrations and
+    lives in the same database as Product, so signal handlers update it inside the
+    same transaction as the product write.
+    """
+
+    name = "fts5"
+    table = "Inventory_Control_productsearch"
+
+    def __init__(self, using):
+        self.using = using
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    @classmethod
+    def available(cls, using):
+        if connections[using].vendor != "sqlite":
+            return False
+        with connections[using].cursor() as cursor:
+            cursor.execute("PRAGMA compile_options")
+            return any(row[0] == "ENABLE_FTS5" for row in cursor.fetchall())
+
+    def _execute(self, sql, params=()):
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall() if cursor.description else None
+
+    def rebuild(self):
+        """
+        Refills the search table from the Product table. Run through the
+        rebuild_search_index command.
+        return: Number of products indexed.
+        """
+        opts = Product._meta
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM "{self.table}"')
+            cursor.execute(
+                f'INSERT INTO "{self.table}" (rowid, "ProductName", "Category") '
+                f'SELECT "ProductId", "ProductName", "Category" FROM "{opts.db_table}"'
+            )
+            cursor.execute(f'INSERT INTO "{self.table}" ("{self.table}") VALUES (\'optimize\')')
+            cursor.execute(f'SELECT COUNT(*) FROM "{self.table}"')
+            return cursor.fetchone()[0]
+
+    def index(self, products):
+        """
+        Adds or replaces the search entries of the given products.
+        products: Iterable of (ProductId, ProductName, Category) tuples.
+        """
+        rows = list(products)
+        if not rows:
+            return
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.executemany(
+                    f'INSERT OR REPLACE INTO "{self.table}" (rowid, "ProductName", "Category") '
+                    "VALUES (%s, %s, %s)",
+                    rows,
+                )
+        except DatabaseError:
+            logger.exception(
+                "Updating the product search index failed; run "
+                "manage.py rebuild_search_index if the product write was committed."
+            )
+            raise
+
+    def remove(self, product_ids):
+        for product_id in product_ids:
+            self._execute(f'DELETE FROM "{self.table}" WHERE rowid = %s', [product_id])
+
+    def _has_prefix(self, term):
+        return bool(
+            self._execute(
+                f'SELECT 1 FROM "{self.table}_vocab" WHERE term >= %s AND term < %s LIMIT 1',
+                [term, term + "\U0010ffff"],
+            )
+        )
+
+    def _corrections(self, term):
+        # Only terms sharing the first letter are compared, which keeps the
+        # vocabulary scan to a small range of the term index.
+        candidates = [
+            row[0]
+            for row in self._execute(
+                f'SELECT term FROM "{self.table}_vocab" WHERE term >= %s AND term < %s',
+                [term[0], term[0] + "\U0010ffff"],
+            )
+        ]
+        return difflib.get_close_matches(
+            term, candidates, n=MAX_CORRECTIONS, cutoff=CORRECTION_CUTOFF
+        )
+
+    def search(self, terms, limit):
+        """
+        Returns up to limit (ProductId, score) pairs matching every term as a prefix,
+        or a close spelling of it, best first.
+        return: (matches, corrections) where corrections maps a misspelt term to
+                the vocabulary terms used instead.
+        """
+        clauses = []
+        corrections = {}
+        for term in terms:
+            if self._has_prefix(term):
+                clauses.append(f'"{term}"*')
+                continue
+            alternatives = self._corrections(term)
+            if not alternatives:
+                return [], corrections
+            corrections[term] = alternatives
+            clauses.append("(" + " OR ".join(f'"{alt}"' for alt in alternatives) + ")")
+
+        rows = self._execute(
+            f'SELECT rowid, bm25("{self.table}", %s, %s) FROM "{self.table}" '
+            f'WHERE "{self.table}" MATCH %s ORDER BY 2 LIMIT %s',
+            [NAME_WEIGHT, CATEGORY_WEIGHT, " AND ".join(clauses), limit],
+        )
+        # bm25() is lower for better matches; flip it so higher scores rank first.
+        return [(product_id, -score) for product_id, score in rows], corrections
+
+
+class InvertedIndexBackend:
+    """
+    In-process inverted index used when FTS5 is not available. It is built from the
+    Product table on first use and kept current by the Product signals of this
+    process; run several processes against one database only with the FTS5 backend.
+    """
+
+    name = "memory"
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, using):
+        self.using = using
+        self._lock = threading.RLock()
+        self._built = False
+        self._postings = defaultdict(dict)  # term -> {ProductId: weighted tf}
+        self._documents = {}  # ProductId -> (terms, length)
+        self._sorted_terms = None
+        self._total_length = 0.0
+
+    @classmethod
+    def available(cls, using):
+        return True
+
+    def ensure(self):
+        if not self._built:
+            self.rebuild()
+
+    def rebuild(self):
+        """
+        Rebuilds the index from the Product table.
+        return: Number of products indexed.
+        """
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+            self._total_length = 0.0
+            self._sorted_terms = None
+            self._add(
+                Product.objects.using(self.using)
+                .values_list("ProductId", "ProductName", "Category")
+                .iterator(chunk_size=5000)
+            )
+            self._built = True
+            return len(self._documents)
+
+    def _add(self, products):
+        for product_id, name, category in products:
+            self._discard(product_id)
+            weights = defaultdict(float)
+            for term in tokenize(name):
+                weights[term] += NAME_WEIGHT
+            for term in tokenize(category):
+                weights[term] += CATEGORY_WEIGHT
+            length = sum(weights.values())
+            for term, weight in weights.items():
+                if term not in self._postings:
+                    self._sorted_terms = None
+                self._postings[term][product_id] = weight
+            self._documents[product_id] = (tuple(weights), length)
+            self._total_length += length
+
+    def _discard(self, product_id):
+        document = self._documents.pop(product_id, None)
+        if document is None:
+            return
+        terms, length = document
+        self._total_length -= length
+        for term in terms:
+            postings = self._postings[term]
+            postings.pop(product_id, None)
+            if not postings:
+                del self._postings[term]
+                self._sorted_terms = None
+
+    def index(self, products):
+        with self._lock:
+            if self._built:
+                self._add(products)
+
+    def remove(self, product_ids):
+        with self._lock:
+            for product_id in product_ids:
+                self._discard(product_id)
+
+    def _terms(self):
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self._postings)
+        return self._sorted_terms
+
+    def search(self, terms, limit):
+        """
+        Same contract as Fts5Backend.search, scored with BM25 over weighted term
+        frequencies.
+        """
+        self.ensure()
+        with self._lock:
+            vocabulary = self._terms()
+            count = len(self._documents)
+            average = self._total_length / count if count else 0.0
+
+            scores = None
+            corrections = {}
+            for term in terms:
+                expansions = _prefix_range(vocabulary, term)
+                if not expansions:
+                    expansions = difflib.get_close_matches(
+                        term,
+                        _prefix_range(vocabulary, term[0]),
+                        n=MAX_CORRECTIONS,
+                        cutoff=CORRECTION_CUTOFF,
+                    )
+                    if not expansions:
+                        return [], corrections
+                    corrections[term] = expansions
+
+                term_scores = defaultdict(float)
+                for expansion in expansions:
+                    postings = self._postings[expansion]
+                    idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for product_id, tf in postings.items():
+                        length = self._documents[product_id][1]
+                        norm = self.K1 * (1 - self.B + self.B * length / average)
+                        term_scores[product_id] += idf * tf * (self.K1 + 1) / (tf + norm)
+
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {
+                        product_id: score + term_scores[product_id]
+                        for product_id, score in scores.items()
+                        if product_id in term_scores
+                    }
+
+            ranked = heapq.nsmallest(
+                limit, (scores or {}).items(), key=lambda item: (-item[1], item[0])
+            )
+            return ranked, corrections
+
+
+BACKENDS = {"fts5": Fts5Backend, "memory": InvertedIndexBackend}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(using=None):
+    """
+    Returns the search backend for the database Product is read from, chosen by
+    settings.PRODUCT_SEARCH_BACKEND ("auto", "fts5" or "memory").
+    """
+    using = using or router.db_for_read(Product)
+    with _backends_lock:
+        backend = _backends.get(using)
+        if backend is None:
+            choice = getattr(settings, "PRODUCT_SEARCH_BACKEND", "auto")
+            if choice == "auto":
+                choice = "fts5" if Fts5Backend.available(using) else "memory"
+            backend = _backends[using] = BACKENDS[choice](using)
+        return backend
+
+
+def search_products(
+    query,
+    category=None,
+    min_stock=None,
+    max_stock=None,
+    below_reorder=False,
+    page=1,
+    page_size=20,
+):
+    """
+    Searches products by name and category with prefix and typo-tolerant matching.
+    query: Free-text query; every term must match (as a prefix or a close spelling).
+    category: Optional category to restrict the results to.
+    min_stock: Optional minimum current stock level.
+    max_stock: Optional maximum current stock level.
+    below_reorder: Only return products whose stock is below their reorder level.
+    page: 1-based page number.
+    page_size: Number of results per page.
+    return: A dictionary with the ranked page of results, Category facet counts,
+            totals and any spelling corrections applied. Filters, facets and totals
+            cover the best PRODUCT_SEARCH_MAX_CANDIDATES matches; "Truncated" tells
+            whether more products matched.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    result = {
+        "Query": query,
+        "Results": [],
+        "Facets": {"Category": {}},
+        "Corrections": {},
+        "Truncated": False,
+        "Total": 0,
+        "Page": 1,
+        "Pages": 1,
+    }
+    if not terms:
+        return result
+
+    limit = getattr(settings, "PRODUCT_SEARCH_MAX_CANDIDATES", 1000)
+    matches, result["Corrections"] = get_backend().search(terms, limit)
+    if not matches:
+        return result
+    scores = dict(matches)
+    result["Truncated"] = len(matches) >= limit
+
+    # One query applies the stock filters to every candidate; facets, the category
+    # filter and ranking then run over the candidate rows in memory.
+    products = Product.objects.filter(pk__in=scores).annotate(
+        CurrentStock=stock_level_expression()
+    )
+    if min_stock is not None:
+        products = products.filter(CurrentStock__gte=min_stock)
+    if max_stock is not None:
+        products = products.filter(CurrentStock__lte=max_stock)
+    if below_reorder:
+        products = products.filter(CurrentStock__lt=F("ReorderLevel"))
+    rows = list(
+        products.values(
+            "ProductId", "ProductName", "Category", "Price", "ReorderLevel", "CurrentStock"
+        )
+    )
+
+    facets = defaultdict(int)
+    for row in rows:
+        facets[row["Category"]] += 1
+    result["Facets"]["Category"] = dict(sorted(facets.items()))
+
+    if category:
+        rows = [row for row in rows if row["Category"] == category]
+    for row in rows:
+        row["Score"] = round(scores[row["ProductId"]], 4)
+    rows.sort(key=lambda row: (-row["Score"], row["ProductId"]))
+
+    paginator = Paginator(rows, page_size)
+    current = paginator.get_page(page)
+    result.update(
+        Results=list(current.object_list),
+        Total=paginator.count,
+        Page=current.number,
+        Pages=paginator.num_pages,
+    )
+    return result
+
+
+def index_products(products):
+    """
+    Updates the search index for products written without signals, e.g. by
+    bulk_create.
+    products: Iterable of Product instances.
+    """
+    get_backend().index(
+        (product.ProductId, product.ProductName, product.Category) for product in products
+    )
+
+
+def _product_saved(sender, instance, **kwargs):
+    index_products([instance])
+
+
+def _product_deleted(sender, instance, **kwargs):
+    get_backend().remove([instance.pk])
+
+
+def connect_signals():
+    """
+    Keeps the search index in step with Product writes.
+    """
+    post_save.connect(_product_saved, sender=Product, dispatch_uid="product-search-save")
+    post_delete.connect(_product_deleted, sender=Product, dispatch_uid="product-search-delete")
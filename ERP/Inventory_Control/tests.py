@@ -1,3 +1,665 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import Permission, User
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import Client, override_settings
+from django.utils import timezone
+
+from ERP.facade import Facade
+from ERP.identity_map import identity_map
+from ERP.testing import QueryCountTestCase
+from Procurement.models import PurchaseOrder, Supplier
+from Sales.models import Sales
+from . import importer, search, views
+from .ledger import compact, location_level_expression, record_movements, stock_at
+from .models import Product, StockLocation, StockMovement, Store
+from .rebalancing import build_plan
+from .reports import build_stock_valuation
+
+
+class StockQueryCountTests(QueryCountTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = Store.objects.create(
+            StoreName="North",
+            Location="Ring Road",
+            ContactNumber="0456",
+            TotalSales=0,
+            OperatingHours=10,
+        )
+        cls.product = Product.objects.create(
+            ProductName="Lamp", Category="Lighting", Price=15, StockLevel=0, ReorderLevel=5
+        )
+        cls.location = StockLocation.objects.create(
+            ProductId=cls.product, StoreId=cls.store, Quantity=12
+        )
+
+    def test_stock_location_str(self):
+        self.location.AdjustStock(-2)
+        location = StockLocation.objects.get(pk=self.location.pk)
+        # Product, store and the current quantity; then only the quantity.
+        with self.assertNumQueries(3):
+            self.assertEqual(str(location), "Lamp - North - Amount: 10")
+        with self.assertNumQueries(1):
+            str(location)
+
+        location = StockLocation.objects.annotate(Current=location_level_expression()).get(
+            pk=self.location.pk
+        )
+        str(location)
+        with self.assertNumQueries(0):
+            self.assertEqual(str(location), "Lamp - North - Amount: 10")
+
+    def test_store_products_include_ledger_tail(self):
+        self.location.AdjustStock(-2)
+        record_movements(
+            [
+                StockMovement(
+                    ProductId=Product.objects.create(
+                        ProductName="Desk", Category="Furniture", Price=1, StockLevel=0, ReorderLevel=1
+                    ),
+                    StoreId=self.store,
+                    Kind=StockMovement.RECEIPT,
+                    Quantity=3,
+                )
+            ]
+        )
+        self.assertEqual(
+            self.store.GetAllProducts(),
+            [
+                {"ProductId__ProductName": "Lamp", "Quantity": 10},
+                {"ProductId__ProductName": "Desk", "Quantity": 3},
+            ],
+        )
+
+    def test_trigger_purchase_order_sufficient_stock(self):
+        facade = Facade()
+        # Product, then its compacted stock plus the ledger tail in one query.
+        with self.assertNumQueries(2):
+            message = facade.TriggerPurchaseOrder(self.product.pk)
+        self.assertIn("is sufficient", message)
+
+    def test_trigger_purchase_order_reuses_result(self):
+        facade = Facade()
+        with identity_map(), self.assertNumQueries(2):
+            facade.TriggerPurchaseOrder(self.product.pk)
+            facade.TriggerPurchaseOrder(self.product.pk)
+
+    def test_trigger_purchase_order_unknown_product(self):
+        with self.assertNumQueries(1):
+            message = Facade().TriggerPurchaseOrder(999999)
+        self.assertEqual(message, "Product ID 999999 does not exist.")
+
+
+class StockLedgerTests(QueryCountTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.north = Store.objects.create(
+            StoreName="North", Location="A", ContactNumber="1", TotalSales=0, OperatingHours=8
+        )
+        cls.south = Store.objects.create(
+            StoreName="South", Location="B", ContactNumber="2", TotalSales=0, OperatingHours=8
+        )
+        cls.product = Product.objects.create(
+            ProductName="Chair", Category="Furniture", Price=40, StockLevel=0, ReorderLevel=2
+        )
+        cls.location = StockLocation.objects.create(
+            ProductId=cls.product, StoreId=cls.north, Quantity=10
+        )
+
+    def test_adjust_stock_only_inserts(self):
+        # Current quantity in one query, then the ledger insert.
+        with self.assertNumQueries(2):
+            self.location.AdjustStock(-4)
+        self.location.refresh_from_db()
+        self.assertEqual(self.location.Quantity, 10)
+        self.assertEqual(self.location.GetCurrentQuantity(), 6)
+        self.assertEqual(self.product.GetStockLevel(), 6)
+
+    def test_transfer_and_compaction(self):
+        self.product.TransferStock(self.north, self.south, 3)
+        self.assertEqual(self.product.GetStockLevel(), 10)
+
+        compact(lag=0)
+        levels = {
+            store: quantity
+            for store, quantity in StockLocation.objects.values_list("StoreId", "Quantity")
+        }
+        self.assertEqual(levels, {self.north.pk: 7, self.south.pk: 3})
+        self.assertEqual(self.product.GetStockLevel(), 10)
+
+    def test_insufficient_stock(self):
+        with self.assertRaises(ValidationError):
+            self.location.AdjustStock(-11)
+        with self.assertRaises(ValidationError):
+            self.product.TransferStock(self.north, self.south, 11)
+
+    def test_admin_records_opening_stock(self):
+        admin = User.objects.create_superuser("admin", password="x")
+        self.client.force_login(admin)
+        url = "/admin/Inventory_Control/stocklocation/"
+        response = self.client.post(
+            f"{url}add/", {"ProductId": self.product.pk, "StoreId": self.south.pk, "Quantity": 5}
+        )
+        self.assertEqual(response.status_code, 302)
+        location = StockLocation.objects.get(ProductId=self.product, StoreId=self.south)
+        self.assertEqual((location.Quantity, location.GetCurrentQuantity()), (0, 5))
+        self.assertEqual(StockMovement.objects.get().Kind, StockMovement.RECEIPT)
+
+        self.client.post(
+            f"{url}{self.location.pk}/change/",
+            {"ProductId": self.product.pk, "StoreId": self.north.pk, "Quantity": 99},
+        )
+        self.assertEqual(self.location.GetCurrentQuantity(), 10)
+
+    def test_admin_adjust_stock_action(self):
+        south = StockLocation.objects.create(ProductId=self.product, StoreId=self.south, Quantity=2)
+        self.client.force_login(User.objects.create_superuser("admin", password="x"))
+        response = self.client.post(
+            "/admin/Inventory_Control/stocklocation/",
+            {"action": "adjust_stock", "quantity": "-3", "_selected_action": [self.location.pk, south.pk]},
+            follow=True,
+        )
+        messages = [str(m) for m in response.context["messages"]]
+        self.assertEqual(
+            messages,
+            ["Adjusted stock for 1 location(s).", "Skipped 1 location(s) with insufficient stock."],
+        )
+        self.assertEqual((self.location.GetCurrentQuantity(), south.GetCurrentQuantity()), (7, 2))
+        self.assertEqual(StockMovement.objects.get().Kind, StockMovement.ADJUSTMENT)
+
+        changelist = self.client.get("/admin/Inventory_Control/stocklocation/").context["cl"]
+        self.assertEqual(
+            {obj.pk: obj.Current for obj in changelist.result_list},
+            {self.location.pk: 7, south.pk: 2},
+        )
+
+    def test_stock_at_point_in_time(self):
+        compact(lag=0)
+        before = timezone.now()
+        self.location.AdjustStock(5)
+        compact(lag=0)
+        self.location.AdjustStock(-2)
+
+        self.assertEqual(self.product.GetStockLevelAt(before), 10)
+        self.assertEqual(self.product.GetStockLevelAt(timezone.now()), 13)
+        self.assertEqual(stock_at(before - timedelta(days=1)), {})
+
+
+class ProductSearchTests(QueryCountTestCase):
+    backend = "fts5"
+
+    @classmethod
+    def setUpTestData(cls):
+        store = Store.objects.create(
+            StoreName="Main", Location="High St", ContactNumber="1", TotalSales=0, OperatingHours=8
+        )
+        for name, category, quantity in [
+            ("Desk Lamp", "Lighting", 2),
+            ("Floor Lamp", "Lighting", 30),
+            ("Lamp Shade", "Decor", 12),
+            ("Office Chair", "Furniture", 4),
+        ]:
+            product = Product.objects.create(
+                ProductName=name, Category=category, Price=10, StockLevel=0, ReorderLevel=5
+            )
+            StockLocation.objects.create(ProductId=product, StoreId=store, Quantity=quantity)
+
+    def setUp(self):
+        super().setUp()
+        override = override_settings(PRODUCT_SEARCH_BACKEND=self.backend)
+        override.enable()
+        self.addCleanup(override.disable)
+        search._backends.clear()
+        self.addCleanup(search._backends.clear)
+        search.get_backend().rebuild()
+
+    def names(self, result):
+        return [row["ProductName"] for row in result["Results"]]
+
+    def test_prefix_match_with_facets(self):
+        result = search.search_products("lam")
+        self.assertEqual(result["Total"], 3)
+        self.assertEqual(result["Facets"]["Category"], {"Decor": 1, "Lighting": 2})
+
+        result = search.search_products("lam", category="Lighting")
+        self.assertEqual(sorted(self.names(result)), ["Desk Lamp", "Floor Lamp"])
+
+    def test_typo_tolerance(self):
+        result = search.search_products("ofice chiar")
+        self.assertEqual(self.names(result), ["Office Chair"])
+        self.assertEqual(result["Corrections"], {"ofice": ["office"], "chiar": ["chair"]})
+
+    def test_stock_filters(self):
+        self.assertEqual(self.names(search.search_products("lamp", below_reorder=True)), ["Desk Lamp"])
+        result = search.search_products("lamp", min_stock=10, max_stock=20)
+        self.assertEqual(self.names(result), ["Lamp Shade"])
+        self.assertEqual(result["Results"][0]["CurrentStock"], 12)
+
+    def test_index_follows_product_writes(self):
+        product = Product.objects.get(ProductName="Office Chair")
+        product.ProductName = "Office Stool"
+        product.save()
+        self.assertEqual(self.names(search.search_products("stool")), ["Office Stool"])
+        self.assertEqual(search.search_products("chair")["Total"], 0)
+
+        product.delete()
+        self.assertEqual(search.search_products("stool")["Total"], 0)
+
+    def test_pagination(self):
+        result = search.search_products("lamp", page=2, page_size=2)
+        self.assertEqual((result["Page"], result["Pages"], len(result["Results"])), (2, 2, 1))
+
+
+class InvertedIndexSearchTests(ProductSearchTests):
+    backend = "memory"
+
+
+class Fts5IndexTests(QueryCountTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = Product.objects.create(
+            ProductName="Desk Lamp", Category="Lighting", Price=10, StockLevel=0, ReorderLevel=5
+        )
+
+    def setUp(self):
+        super().setUp()
+        search._backends.clear()
+        self.addCleanup(search._backends.clear)
+        self.backend = search._backends["default"] = search.Fts5Backend("default")
+
+    def names(self, query):
+        return [row["ProductName"] for row in search.search_products(query)["Results"]]
+
+    def test_migrated_table_follows_product_writes(self):
+        self.assertEqual(self.names("lamp"), ["Desk Lamp"])
+        Product.objects.create(
+            ProductName="Floor Fan", Category="Cooling", Price=10, StockLevel=0, ReorderLevel=5
+        )
+        self.assertEqual(self.names("fan"), ["Floor Fan"])
+        self.product.delete()
+        self.assertEqual(self.names("lamp"), [])
+
+    def test_failed_update_is_raised_and_rebuilt_by_command(self):
+        self.product.ProductName = "Desk Fan"
+        broken = mock.Mock(cursor=mock.Mock(side_effect=DatabaseError("disk I/O error")))
+        with mock.patch.object(
+            search.Fts5Backend, "connection", new_callable=mock.PropertyMock, return_value=broken
+        ), self.assertLogs("Inventory_Control.search", "ERROR"), self.assertRaises(DatabaseError):
+            self.product.save()
+        self.assertEqual(self.names("fan"), [])
+
+        out = io.StringIO()
+        call_command("rebuild_search_index", stdout=out)
+        self.assertEqual(out.getvalue().strip(), "Indexed 1 product(s) with the fts5 backend.")
+        self.assertEqual(self.names("fan"), ["Desk Fan"])
+
+
+class RebalancingTests(QueryCountTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.north, cls.south = [
+            Store.objects.create(
+                StoreName=name, Location="A", ContactNumber="1", TotalSales=0, OperatingHours=8
+            )
+            for name in ("North", "South")
+        ]
+        cls.kettle = Product.objects.create(
+            ProductName="Kettle", Category="Kitchen", Price=2, StockLevel=0, ReorderLevel=5
+        )
+        cls.toaster = Product.objects.create(
+            ProductName="Toaster", Category="Kitchen", Price=3, StockLevel=0, ReorderLevel=8
+        )
+        StockLocation.objects.create(ProductId=cls.kettle, StoreId=cls.north, Quantity=20)
+        # 10 units of each sold in the south over the last 30 days: 5 units cover 14 days.
+        for product in (cls.kettle, cls.toaster):
+            Sales.objects.create(
+                PaymentMethod="Cash", TotalAmount=10 * product.Price, StoreId=cls.south, ProductId=product
+            )
+
+    def test_plan_transfers_before_purchasing(self):
+        plan = build_plan(workers=0)
+        self.assertEqual(
+            plan.transfers,
+            [{"ProductId": self.kettle.pk, "FromStoreId": self.north.pk, "ToStoreId": self.south.pk, "Quantity": 5}],
+        )
+        # Nothing to transfer for the toaster, and the reorder level exceeds the shortfall.
+        self.assertEqual(plan.purchases, [{"ProductId": self.toaster.pk, "Quantity": 8, "TotalAmount": 24}])
+
+    def test_apply_skips_pending_orders(self):
+        plan = build_plan(workers=0)
+        self.assertEqual(
+            plan.apply(),
+            {"Transfers": 1, "SkippedTransfers": 0, "PurchaseOrders": 1, "SkippedPurchases": 0},
+        )
+        self.assertEqual(self.kettle.GetStockLevel(), 20)
+        self.assertEqual(
+            StockLocation(ProductId=self.kettle, StoreId=self.south).GetCurrentQuantity(), 5
+        )
+        self.assertEqual(StockMovement.objects.filter(Kind=StockMovement.TRANSFER).count(), 2)
+
+        outcome = build_plan(workers=0).apply()
+        self.assertEqual((outcome["PurchaseOrders"], outcome["SkippedPurchases"]), (0, 1))
+        self.assertEqual(PurchaseOrder.objects.filter(ProductId=self.toaster).count(), 1)
+
+    def test_apply_reports_orders_it_inserted(self):
+        plan = build_plan(workers=0)
+        # Another process orders the toaster after the pending check has run, so the
+        # check misses it and the constraint rejects our row.
+        PurchaseOrder.objects.create(ProductId=self.toaster, TotalAmount=1, OrderStatus="Pending")
+        with mock.patch.object(
+            PurchaseOrder.objects, "filter", return_value=PurchaseOrder.objects.none()
+        ):
+            outcome = plan.apply()
+        self.assertEqual((outcome["PurchaseOrders"], outcome["SkippedPurchases"]), (0, 1))
+        self.assertEqual(
+            list(PurchaseOrder.objects.values_list("ProductId", "TotalAmount")),
+            [(self.toaster.pk, 1)],
+        )
+        # The transfers in the same transaction are kept.
+        self.assertEqual(StockMovement.objects.filter(Kind=StockMovement.TRANSFER).count(), 2)
+
+
+class CatalogueImportTests(QueryCountTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.path = os.path.join(self.directory, "products.csv")
+        self.checkpoint = os.path.join(self.directory, "products.json")
+
+    def write(self, rows, path=None):
+        with open(path or self.path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=importer.COLUMNS["products"])
+            writer.writeheader()
+            for i, name in rows:
+                writer.writerow(
+                    {
+                        "ProductId": i,
+                        "ProductName": name,
+                        "Category": "C",
+                        "Price": "1.50",
+                        "StockLevel": 0,
+                        "ReorderLevel": 1,
+                    }
+                )
+
+    def run_import(self, **kwargs):
+        kwargs.setdefault("chunk_size", 2)
+        return importer.CatalogueImport(
+            "products", self.path, workers=0, checkpoint_path=self.checkpoint, **kwargs
+        ).run()
+
+    def test_chunks_are_upserted(self):
+        self.write([(i, f"P{i}") for i in range(1, 6)])
+        state = self.run_import()
+        self.assertEqual((state["rows_done"], state["imported"], state["status"]), (5, 5, "done"))
+
+        self.write([(1, "Renamed"), (2, "")])
+        state = self.run_import()
+        self.assertEqual((state["rows_done"], state["imported"]), (2, 1))
+        self.assertEqual(state["errors"], [(3, "ProductName is required.")])
+        self.assertEqual(Product.objects.count(), 5)
+        self.assertEqual(Product.objects.get(pk=1).ProductName, "Renamed")
+
+    def test_duplicate_keys_keep_the_last_row(self):
+        self.write([(1, "First"), (1, "Second"), (2, "P2")])
+        state = self.run_import(chunk_size=5)
+        self.assertEqual((state["rows_done"], state["imported"]), (3, 2))
+        self.assertEqual(Product.objects.get(pk=1).ProductName, "Second")
+
+    def test_missing_optional_columns_keep_existing_values(self):
+        supplier = Supplier.objects.create(
+            SupplierName="Acme", ContactDetails="x", Location="y", ContractTerms="z"
+        )
+        with open(self.path, "w", newline="") as f:
+            f.write(
+                "ProductId,ProductName,Category,Price,StockLevel,ReorderLevel,LastPurchaseDate,SupplierName\n"
+                "1,P1,C,1.50,0,1,2024-01-31,Acme\n"
+            )
+        self.run_import()
+
+        self.write([(1, "Renamed")])
+        self.run_import()
+        product = Product.objects.get(pk=1)
+        self.assertEqual(product.ProductName, "Renamed")
+        self.assertEqual((product.SupplierId_id, str(product.LastPurchaseDate)), (supplier.pk, "2024-01-31"))
+
+    def test_header_failures_are_checkpointed(self):
+        with open(self.path, "w", newline="") as f:
+            f.write("ProductId,ProductName\n1,P1\n")
+        with self.assertRaises(importer.CatalogueImportError):
+            self.run_import()
+        with open(self.checkpoint) as f:
+            state = json.load(f)
+        self.assertEqual(state["status"], "failed")
+        self.assertIn("Missing columns: Category", state["failure"])
+
+        with open(self.path, "wb") as f:
+            f.write(b"\xff\xfeProductId\n")
+        with self.assertRaises(UnicodeDecodeError):
+            self.run_import()
+        with open(self.checkpoint) as f:
+            self.assertEqual(json.load(f)["status"], "failed")
+
+    def test_background_failures_are_logged(self):
+        missing = os.path.join(self.directory, "missing.csv")
+        with mock.patch("Inventory_Control.views.connection"), self.assertLogs(
+            "Inventory_Control.views", "ERROR"
+        ):
+            views._run_import("products", missing, self.checkpoint)
+        with open(self.checkpoint) as f:
+            self.assertEqual(json.load(f)["status"], "failed")
+
+    def test_errors_are_capped(self):
+        self.write([(i, "") for i in range(1, 6)])
+        with mock.patch.object(importer, "MAX_REPORTED_ERRORS", 2):
+            state = self.run_import()
+        self.assertEqual((state["error_count"], len(state["errors"])), (5, 2))
+        self.assertFalse(Product.objects.exists())
+
+    def interrupt_after_first_chunk(self):
+        def progress(state):
+            raise RuntimeError("interrupted")
+
+        with self.assertRaises(RuntimeError):
+            self.run_import(progress=progress)
+
+    def test_interrupted_import_resumes(self):
+        self.write([(i, f"P{i}") for i in range(1, 6)])
+        self.interrupt_after_first_chunk()
+        self.assertEqual(Product.objects.count(), 2)
+
+        state = self.run_import()
+        self.assertEqual((state["rows_done"], state["imported"], state["status"]), (5, 5, "done"))
+        self.assertEqual(Product.objects.count(), 5)
+
+    def test_rewritten_file_starts_over(self):
+        self.write([(i, f"P{i}") for i in range(1, 6)])
+        self.interrupt_after_first_chunk()
+
+        self.write([(i, f"New{i}") for i in range(1, 4)])
+        state = self.run_import()
+        self.assertEqual((state["rows_done"], state["imported"]), (3, 3))
+        self.assertEqual(Product.objects.get(pk=1).ProductName, "New1")
+
+        # A finished run is not resumed either.
+        self.assertEqual(self.run_import()["rows_done"], 3)
+
+    def test_stock_is_recorded_in_the_ledger(self):
+        north = Store.objects.create(
+            StoreName="North", Location="A", ContactNumber="1", TotalSales=0, OperatingHours=8
+        )
+        stocked, new = [
+            Product.objects.create(ProductName=name, Category="C", Price=1, StockLevel=0, ReorderLevel=1)
+            for name in ("Stocked", "New")
+        ]
+        location = StockLocation.objects.create(ProductId=stocked, StoreId=north, Quantity=10)
+        with open(self.path, "w", newline="") as f:
+            f.write(f"ProductId,StoreName,Quantity\n{stocked.pk},North,7\n{new.pk},North,4\n{new.pk},South,1\n")
+
+        state = importer.CatalogueImport(
+            "stock", self.path, workers=0, checkpoint_path=self.checkpoint
+        ).run()
+        self.assertEqual((state["imported"], state["errors"]), (2, [(4, "Unknown store 'South'.")]))
+        location.refresh_from_db()
+        self.assertEqual((location.Quantity, location.GetCurrentQuantity()), (10, 7))
+        self.assertEqual(
+            sorted(StockMovement.objects.values_list("ProductId", "Kind", "Quantity")),
+            [(stocked.pk, StockMovement.ADJUSTMENT, -3), (new.pk, StockMovement.RECEIPT, 4)],
+        )
+
+    def test_upload_requires_permission(self):
+        self.write([(1, "P1")])
+        url = "/inventory/import/"
+
+        def upload(client):
+            with open(self.path, "rb") as f:
+                data = {"kind": "products", "file": SimpleUploadedFile("p.csv", f.read())}
+            return client.post(url, data)
+
+        self.assertEqual(upload(self.client).status_code, 302)
+
+        user = User.objects.create_user("clerk", password="x", is_staff=True)
+        self.client.force_login(user)
+        self.assertEqual(upload(self.client).status_code, 403)
+
+        user.user_permissions.add(
+            *Permission.objects.filter(codename__in=["add_product", "change_product"])
+        )
+        strict = Client(enforce_csrf_checks=True)
+        strict.force_login(user)
+        self.assertEqual(upload(strict).status_code, 403)
+
+        with override_settings(IMPORT_ROOT=self.directory), mock.patch(
+            "Inventory_Control.views.threading.Thread"
+        ) as thread:
+            response = upload(self.client)
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(thread.call_args.kwargs["args"][0], "products")
+            status = self.client.get(f"{url}{response.json()['job']}/")
+        self.assertEqual(status.json(), {"status": "pending"})
+
+
+class StockValuationTests(QueryCountTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.north, cls.south = [
+            Store.objects.create(
+                StoreName=name, Location="A", ContactNumber="1", TotalSales=0, OperatingHours=8
+            )
+            for name in ("North", "South")
+        ]
+        cls.lamp = Product.objects.create(
+            ProductName="Lamp", Category="Lighting", Price="2.50", StockLevel=0, ReorderLevel=1
+        )
+        cls.sofa = Product.objects.create(
+            ProductName="Sofa", Category="Furniture", Price="100.00", StockLevel=0, ReorderLevel=1
+        )
+        cls.today = timezone.localdate()
+        for product, store, quantity, age in (
+            (cls.lamp, cls.north, 4, 0),
+            (cls.lamp, cls.south, 6, 30),
+            (cls.sofa, cls.north, 1, 31),
+        ):
+            location = StockLocation.objects.create(ProductId=product, StoreId=store, Quantity=quantity)
+            StockLocation.objects.filter(pk=location.pk).update(
+                Date=timezone.now() - timedelta(days=age)
+            )
+
+    def sections(self, report, section, *fields):
+        return {
+            tuple(row[field] for field in fields): (row["Quantity"], row["Value"])
+            for row in report[section]
+        }
+
+    def test_grouped_sums(self):
+        report = build_stock_valuation(chunk_size=2)
+        self.assertEqual((report["TotalQuantity"], report["TotalValue"]), (11, Decimal("125.00")))
+        self.assertEqual(
+            self.sections(report, "ByStore", "StoreName"),
+            {("North",): (5, Decimal("110.00")), ("South",): (6, Decimal("15.00"))},
+        )
+        self.assertEqual(
+            self.sections(report, "ByCategory", "Category"),
+            {("Furniture",): (1, Decimal("100.00")), ("Lighting",): (10, Decimal("25.00"))},
+        )
+        self.assertEqual(
+            self.sections(report, "ByStoreCategory", "StoreName", "Category"),
+            {
+                ("North", "Furniture"): (1, Decimal("100.00")),
+                ("North", "Lighting"): (4, Decimal("10.00")),
+                ("South", "Lighting"): (6, Decimal("15.00")),
+            },
+        )
+
+    def test_bucket_edges(self):
+        rug = Product.objects.create(
+            ProductName="Rug", Category="Furniture", Price=1, StockLevel=0, ReorderLevel=1
+        )
+        for product, quantity, age in ((self.sofa, 2, 366), (rug, 3, 365)):
+            old = StockLocation.objects.create(ProductId=product, StoreId=self.south, Quantity=quantity)
+            StockLocation.objects.filter(pk=old.pk).update(Date=timezone.now() - timedelta(days=age))
+        Product.objects.filter(pk=self.lamp.pk).update(LastPurchaseDate=self.today - timedelta(days=400))
+
+        aging = {
+            row["Bucket"]: row["Quantity"]
+            for row in build_stock_valuation(as_of=self.today)["Aging"]
+        }
+        # The lamps are aged from their later location date, not the old purchase.
+        self.assertEqual(
+            aging, {"0-30": 10, "31-60": 1, "61-90": 0, "91-180": 0, "181-365": 3, "366+": 2}
+        )
+
+    def test_ledger_tail_is_included(self):
+        StockLocation.objects.get(ProductId=self.lamp, StoreId=self.north).AdjustStock(-3)
+        record_movements(
+            [StockMovement(ProductId=self.sofa, StoreId=self.south, Kind=StockMovement.RECEIPT, Quantity=2)]
+        )
+        report = build_stock_valuation()
+        self.assertEqual(
+            self.sections(report, "ByStoreCategory", "StoreName", "Category"),
+            {
+                ("North", "Furniture"): (1, Decimal("100.00")),
+                ("North", "Lighting"): (1, Decimal("2.50")),
+                ("South", "Furniture"): (2, Decimal("200.00")),
+                ("South", "Lighting"): (6, Decimal("15.00")),
+            },
+        )
+
+    def test_past_date_rebuilds_quantities(self):
+        StockLocation.objects.all().delete()
+        now = timezone.now()
+        record_movements(
+            StockMovement(
+                ProductId=self.lamp, StoreId=self.north, Kind=StockMovement.RECEIPT, Quantity=quantity, Timestamp=when
+            )
+            for quantity, when in ((5, now - timedelta(days=10)), (3, now))
+        )
+        past = build_stock_valuation(as_of=self.today - timedelta(days=5))
+        self.assertEqual((past["TotalQuantity"], past["TotalValue"]), (5, Decimal("12.50")))
+        self.assertEqual(past["Aging"][0], {"Bucket": "0-30", "Quantity": 5, "Value": Decimal("12.50")})
+        self.assertEqual(build_stock_valuation()["TotalQuantity"], 8)
+
+    def test_view_requires_staff(self):
+        url = "/inventory/stock-valuation/"
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        self.client.force_login(User.objects.create_user("clerk", password="x"))
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        self.client.force_login(User.objects.create_user("manager", password="x", is_staff=True))
+        response = self.client.get(url, {"as_of": self.today.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["TotalQuantity"], 11)
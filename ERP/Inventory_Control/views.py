@@ -1,8 +1,23 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import connection
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from ERP.facade import Facade
+from ERP.serializers import json_response
+from Inventory_Control.importer import COLUMNS, CatalogueImport
 from Inventory_Control.models import Product
+from Inventory_Control.reports import build_stock_valuation
+from Inventory_Control.search import search_products
+from datetime import date
+from pathlib import Path
 import json
+import logging
+import threading
+import uuid
+
+
+logger = logging.getLogger(__name__)
 
 
 @csrf_exempt
@@ -44,3 +59,156 @@ def trigger_purchase_order(request):
 
     # If not POST, return method not allowed
     return JsonResponse({"error": "Only POST method is allowed."}, status=405)
+
+
+@staff_member_required
+def stock_valuation_report(request):
+    """
+    Function-based view returning stock value by store and category plus aging buckets.
+
+    :param request: The HTTP request object. Accepts an optional "as_of" date (YYYY-MM-DD)
+                    to value and age the stock at.
+    :return: A JsonResponse containing the valuation report.
+    """
+    if request.method != "GET":
+        return JsonResponse({"error": "Only GET method is allowed."}, status=405)
+
+    as_of = request.GET.get("as_of")
+    try:
+        as_of = date.fromisoformat(as_of) if as_of else None
+    except ValueError:
+        return JsonResponse({"error": "as_of must be a date (YYYY-MM-DD)."}, status=400)
+
+    try:
+        return json_response(request, build_stock_valuation(as_of=as_of))
+    except Exception as e:
+        return JsonResponse({"error": f"An error occurred: {str(e)}"}, status=500)
+
+
+# Permissions a user needs to import each kind of file.
+IMPORT_PERMISSIONS = {
+    "suppliers": ("Procurement.add_supplier", "Procurement.change_supplier"),
+    "products": ("Inventory_Control.add_product", "Inventory_Control.change_product"),
+    "stock": ("Inventory_Control.add_stockmovement",),
+}
+
+
+def _run_import(kind, path, checkpoint_path):
+    # Validation stays in this thread: forking a process pool from a threaded web
+    # worker is unsafe. If the worker restarts mid-import, resume it with
+    # "manage.py import_catalogue <kind> <path> --checkpoint <checkpoint_path>".
+    try:
+        CatalogueImport(kind, path, workers=0, checkpoint_path=checkpoint_path).run()
+    except Exception:
+        # The failure is also recorded in the checkpoint for import_status to report.
+        logger.exception("Catalogue import of %s (%s) failed", path, kind)
+    finally:
+        connection.close()
+
+
+@staff_member_required
+def import_catalogue(request):
+    """
+    Function-based view that accepts a CSV upload and imports it in the background.
+
+    :param request: The HTTP request object with a "kind" field (suppliers, products
+                    or stock) and a "file" upload, from a staff user allowed to
+                    write that kind of record.
+    :return: A JsonResponse with the job ID to poll with import_status.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "Only POST method is allowed."}, status=405)
+
+    kind = request.POST.get("kind")
+    upload = request.FILES.get("file")
+    if kind not in COLUMNS:
+        return JsonResponse(
+            {"error": f"kind must be one of: {', '.join(sorted(COLUMNS))}."}, status=400
+        )
+    if not request.user.has_perms(IMPORT_PERMISSIONS[kind]):
+        return JsonResponse({"error": f"You may not import {kind}."}, status=403)
+    if upload is None:
+        return JsonResponse({"error": "A CSV file is required."}, status=400)
+
+    job_id = uuid.uuid4().hex
+    import_root = Path(settings.IMPORT_ROOT)
+    import_root.mkdir(parents=True, exist_ok=True)
+    path = import_root / f"{job_id}.csv"
+    with open(path, "wb") as f:
+        for chunk in upload.chunks():
+            f.write(chunk)
+
+    threading.Thread(
+        target=_run_import,
+        args=(kind, path, import_root / f"{job_id}.json"),
+        daemon=True,
+    ).start()
+
+    return JsonResponse({"job": job_id}, status=202)
+
+
+@staff_member_required
+def import_status(request, job_id):
+    """
+    Function-based view reporting the progress of a background import.
+
+    :param request: The HTTP request object, from a staff user allowed to import
+                    the job's kind of file.
+    :param job_id: The job ID returned by import_catalogue.
+    :return: A JsonResponse with the import checkpoint state.
+    """
+    path = Path(settings.IMPORT_ROOT) / f"{job_id}.json"
+    if not job_id.isalnum() or not path.exists():
+        if not any(request.user.has_perms(perms) for perms in IMPORT_PERMISSIONS.values()):
+            return JsonResponse({"error": "You may not view imports."}, status=403)
+        return JsonResponse({"status": "pending"}, status=200)
+
+    with open(path) as f:
+        state = json.load(f)
+    perms = IMPORT_PERMISSIONS.get(state.get("kind"))
+    if perms is None or not request.user.has_perms(perms):
+        return JsonResponse({"error": "You may not view this import."}, status=403)
+    state.pop("path", None)
+    state.pop("file", None)
+    return JsonResponse(state, status=200)
+
+
+def product_search(request):
+    """
+    Function-based view searching products by name and category.
+
+    :param request: The HTTP request object. Accepts "q" plus optional "category",
+                    "min_stock", "max_stock", "below_reorder", "page" and "page_size".
+    :return: A JsonResponse with ranked results, Category facets and paging info.
+    """
+    if request.method != "GET":
+        return JsonResponse({"error": "Only GET method is allowed."}, status=405)
+
+    query = request.GET.get("q", "").strip()
+    if not query:
+        return JsonResponse({"error": "q is required."}, status=400)
+
+    try:
+        numbers = {
+            name: int(request.GET[name]) if request.GET.get(name) else None
+            for name in ("min_stock", "max_stock", "page", "page_size")
+        }
+    except ValueError:
+        return JsonResponse(
+            {"error": "min_stock, max_stock, page and page_size must be integers."},
+            status=400,
+        )
+
+    try:
+        results = search_products(
+            query,
+            category=request.GET.get("category") or None,
+            min_stock=numbers["min_stock"],
+            max_stock=numbers["max_stock"],
+            below_reorder=request.GET.get("below_reorder") in ("1", "true"),
+            page=numbers["page"] or 1,
+            page_size=min(numbers["page_size"] or 20, 100),
+        )
+        return json_response(request, results)
+    except Exception as e:
+        return JsonResponse({"error": f"An error occurred: {str(e)}"}, status=500)
@@ -1,5 +1,47 @@
 from django.contrib import admin
+from django.utils import timezone
+
+from ERP.pagination import EstimatedCountPaginator
 from .models import *
 
-admin.site.register(Supplier)
-admin.site.register(PurchaseOrder)
+
+@admin.register(Supplier)
+class SupplierAdmin(admin.ModelAdmin):
+    list_display = ("SupplierId", "SupplierName", "Location", "ContactDetails")
+    search_fields = ("SupplierName", "Location")
+    ordering = ("SupplierId",)
+
+
+@admin.register(PurchaseOrder)
+class PurchaseOrderAdmin(admin.ModelAdmin):
+    list_display = (
+        "PurchaseOrderId",
+        "ProductId",
+        "TotalAmount",
+        "OrderDate",
+        "DeliveryDate",
+        "OrderStatus",
+    )
+    list_select_related = ("ProductId",)
+    list_filter = ("OrderStatus",)
+    raw_id_fields = ("ProductId",)
+    date_hierarchy = "OrderDate"
+    ordering = ("-PurchaseOrderId",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ["mark_delivered", "mark_cancelled"]
+
+    @admin.action(description="Mark selected pending orders as Delivered")
+    def mark_delivered(self, request, queryset):
+        pending = queryset.filter(OrderStatus="Pending")
+        # Keep an expected delivery date if one was set, otherwise record today.
+        pending.filter(DeliveryDate__isnull=True).update(
+            DeliveryDate=timezone.localdate()
+        )
+        updated = pending.update(OrderStatus="Delivered")
+        self.message_user(request, f"Marked {updated} order(s) as Delivered.")
+
+    @admin.action(description="Mark selected pending orders as Cancelled")
+    def mark_cancelled(self, request, queryset):
+        updated = queryset.filter(OrderStatus="Pending").update(OrderStatus="Cancelled")
+        self.message_user(request, f"Marked {updated} order(s) as Cancelled.")
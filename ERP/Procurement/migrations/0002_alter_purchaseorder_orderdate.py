@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 17:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Procurement', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='purchaseorder',
+            name='OrderDate',
+            field=models.DateField(auto_now_add=True, db_index=True),
+        ),
+    ]
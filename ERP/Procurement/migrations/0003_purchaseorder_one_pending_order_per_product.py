@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 17:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Procurement', '0002_alter_purchaseorder_orderdate'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='purchaseorder',
+            constraint=models.UniqueConstraint(condition=models.Q(('OrderStatus', 'Pending')), fields=('ProductId',), name='one_pending_order_per_product'),
+        ),
+    ]
@@ -2,6 +2,8 @@ from django.db import models
 from Inventory_Control.models import Product
 from django.db.models import Sum, Avg, Count
 from datetime import datetime, timedelta
+from ERP.profiling import traced
+from ERP.reference_cache import get_related
 
 
 class Supplier(models.Model):
@@ -32,6 +34,7 @@ class Supplier(models.Model):
             setattr(self, field, value)
         self.save()
 
+    @traced()
     def ViewSupplierPerformance(self, dateRange=30):
         """
         Analyses the supplier's performance based on delivered orders over a specified period.
@@ -62,22 +65,33 @@ class PurchaseOrder(models.Model):
     PurchaseOrderId = models.AutoField(primary_key=True, unique=True)
     TotalAmount = models.IntegerField()
     ProductId = models.ForeignKey(Product, on_delete=models.CASCADE)
-    OrderDate = models.DateField(auto_now_add=True)
+    OrderDate = models.DateField(auto_now_add=True, db_index=True)
     DeliveryDate = models.DateField(blank=True, null=True)
     OrderStatus = models.CharField(max_length=200)
 
+    class Meta:
+        constraints = [
+            # Guards against duplicate reorders from concurrent triggers.
+            models.UniqueConstraint(
+                fields=["ProductId"],
+                condition=models.Q(OrderStatus="Pending"),
+                name="one_pending_order_per_product",
+            )
+        ]
+
     def __str__(self):
-        return f"Id:{self.PurchaseOrderId} - Contains:{self.ProductId.ProductName} - Amount:{self.TotalAmount} - Status:{self.OrderStatus}"
+        return f"Id:{self.PurchaseOrderId} - Contains:{get_related(self, 'ProductId').ProductName} - Amount:{self.TotalAmount} - Status:{self.OrderStatus}"
 
     @classmethod
+    @traced()
     def CreatePurchaseOrder(
-        cls, product, totalAmount, deliveryDate, orderStatus="Pending"
+        cls, product, totalAmount, deliveryDate=None, orderStatus="Pending"
     ):
         """
         Creates a new purchase order.
         :param product: Product instance to be ordered.
         :param totalAmount: Total amount of the purchase.
-        :param deliveryDate: Expected delivery date.
+        :param deliveryDate: Expected delivery date, if known.
         :param orderStatus: Status of the order. Default is 'Pending'.
         """
         return cls.objects.create(
@@ -1,3 +1,162 @@
-from django.test import TestCase
+import threading
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from ERP.facade import Facade
+from ERP.singleflight import SingleFlight
+from ERP.testing import QueryCountTestCase
+from Inventory_Control.models import Product, StockLocation, Store
+from .models import PurchaseOrder, Supplier
+
+
+class ReorderCoalescingTests(QueryCountTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        supplier = Supplier.objects.create(
+            SupplierName="Acme", ContactDetails="x", Location="y", ContractTerms="z"
+        )
+        store = Store.objects.create(
+            StoreName="East", Location="Dock", ContactNumber="9", TotalSales=0, OperatingHours=8
+        )
+        cls.product = Product.objects.create(
+            ProductName="Bolt",
+            Category="Hardware",
+            Price=2,
+            StockLevel=0,
+            ReorderLevel=10,
+            SupplierId=supplier,
+        )
+        StockLocation.objects.create(ProductId=cls.product, StoreId=store, Quantity=4)
+
+    def test_creates_one_pending_order(self):
+        first = Facade().TriggerPurchaseOrder(self.product.pk)
+        self.assertIn("created for product ID", first)
+        self.assertIn("with quantity 6", first)
+
+        # Served from the short-lived result cache.
+        with self.assertNumQueries(0):
+            self.assertEqual(Facade().TriggerPurchaseOrder(self.product.pk), first)
+        self.assertEqual(PurchaseOrder.objects.filter(ProductId=self.product).count(), 1)
+
+    def test_existing_pending_order_is_reported(self):
+        order = PurchaseOrder.CreatePurchaseOrder(product=self.product, totalAmount=12)
+        message = Facade().TriggerPurchaseOrder(self.product.pk)
+        self.assertEqual(
+            message,
+            f"Purchase order {order.PurchaseOrderId} is already pending for product ID {self.product.pk}.",
+        )
+
+    def test_database_rejects_second_pending_order(self):
+        PurchaseOrder.CreatePurchaseOrder(product=self.product, totalAmount=12)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            PurchaseOrder.CreatePurchaseOrder(product=self.product, totalAmount=12)
+        PurchaseOrder.objects.update(OrderStatus="Delivered")
+        PurchaseOrder.CreatePurchaseOrder(product=self.product, totalAmount=12)
+
+
+class _CountedEvent(threading.Event):
+    """
+    Event that signals `waiting` each time a thread starts waiting on it.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.waiting = threading.Semaphore(0)
+
+    def wait(self, timeout=None):
+        self.waiting.release()
+        return super().wait(timeout)
+
+
+class SingleFlightTests(QueryCountTestCase):
+    def test_concurrent_calls_share_one_result(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+        results = []
+
+        def work():
+            calls.append(1)
+            started.set()
+            release.wait()
+            return "done"
+
+        leader = threading.Thread(target=lambda: results.append(flight.do(1, work)))
+        leader.start()
+        self.assertTrue(started.wait(5))
+        # Count the followers as they block on the leader's call.
+        done = flight._calls[1].done = _CountedEvent()
+        followers = [
+            threading.Thread(target=lambda: results.append(flight.do(1, work)))
+            for _ in range(5)
+        ]
+        for thread in followers:
+            thread.start()
+        for _ in followers:
+            self.assertTrue(done.waiting.acquire(timeout=5))
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join()
+
+        self.assertEqual(results, ["done"] * 6)
+        self.assertEqual(len(calls), 1)
+        self.assertFalse(flight.in_flight(1))
+
+    def test_errors_are_shared_and_not_cached(self):
+        flight = SingleFlight()
+        with self.assertRaises(ValueError):
+            flight.do("k", lambda: (_ for _ in ()).throw(ValueError("boom")))
+        self.assertEqual(flight.do("k", lambda: 1), 1)
+
+
+class PurchaseOrderAdminTests(QueryCountTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        products = [
+            Product.objects.create(
+                ProductName=f"P{i}", Category="C", Price=1, StockLevel=0, ReorderLevel=1
+            )
+            for i in range(3)
+        ]
+        cls.pending, cls.expected, cls.delivered = [
+            PurchaseOrder.objects.create(ProductId=product, TotalAmount=5, OrderStatus=status)
+            for product, status in zip(products, ("Pending", "Pending", "Delivered"))
+        ]
+        PurchaseOrder.objects.filter(pk=cls.expected.pk).update(DeliveryDate="2030-01-31")
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create_superuser("admin", password="x"))
+
+    def act(self, action):
+        self.client.post(
+            "/admin/Procurement/purchaseorder/",
+            {
+                "action": action,
+                "_selected_action": [o.pk for o in (self.pending, self.expected, self.delivered)],
+            },
+        )
+        return {
+            o.pk: (o.OrderStatus, o.DeliveryDate and str(o.DeliveryDate))
+            for o in PurchaseOrder.objects.all()
+        }
+
+    def test_mark_delivered_keeps_expected_dates(self):
+        self.assertEqual(
+            self.act("mark_delivered"),
+            {
+                self.pending.pk: ("Delivered", str(timezone.localdate())),
+                self.expected.pk: ("Delivered", "2030-01-31"),
+                self.delivered.pk: ("Delivered", None),
+            },
+        )
+
+    def test_mark_cancelled_only_touches_pending_orders(self):
+        statuses = {pk: status for pk, (status, _) in self.act("mark_cancelled").items()}
+        self.assertEqual(
+            statuses,
+            {self.pending.pk: "Cancelled", self.expected.pk: "Cancelled", self.delivered.pk: "Delivered"},
+        )
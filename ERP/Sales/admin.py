@@ -1,5 +1,23 @@
 from django.contrib import admin
 
+from ERP.pagination import EstimatedCountPaginator
 from .models import *
 
-admin.site.register(Sales)
+
+@admin.register(Sales)
+class SalesAdmin(admin.ModelAdmin):
+    list_display = (
+        "SalesId",
+        "DateOfSale",
+        "StoreId",
+        "ProductId",
+        "StaffId",
+        "PaymentMethod",
+        "TotalAmount",
+    )
+    list_select_related = ("StoreId", "ProductId", "StaffId__DepartmentId")
+    raw_id_fields = ("StoreId", "ProductId", "StaffId")
+    date_hierarchy = "DateOfSale"
+    ordering = ("-SalesId",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
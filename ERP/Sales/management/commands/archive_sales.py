@@ -0,0 +1,39 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Sales.partitions import archive_closed_months, restore_month
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves closed months of sales into compressed archive storage, keeping "
+        "recent sales in the hot Sales table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep-days",
+            type=int,
+            default=90,
+            help="Months ending within this many days stay in the hot table.",
+        )
+        parser.add_argument("--restore", metavar="YYYY-MM", help="Move an archived month back.")
+
+    def handle(self, *args, **options):
+        if options["restore"]:
+            try:
+                month = date.fromisoformat(f"{options['restore']}-01")
+            except ValueError:
+                raise CommandError("--restore must be a month (YYYY-MM).")
+            restored = restore_month(month)
+            self.stdout.write(self.style.SUCCESS(f"Restored {restored} sales for {month:%Y-%m}."))
+            return
+
+        archives = archive_closed_months(keep_days=options["keep_days"])
+        for archive in archives:
+            self.stdout.write(
+                f"Archived {archive.Month:%Y-%m}: {archive.RowCount} sales, "
+                f"{len(archive.Rows)} bytes compressed"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Archived {len(archives)} month(s)."))
@@ -0,0 +1,80 @@
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.http import JsonResponse
+from django.test.utils import override_settings
+
+from ERP import serializers
+from ERP.facade import Facade
+
+
+class Command(BaseCommand):
+    help = "Compares JsonResponse against the configurable serializers on sales results."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100000, help="Synthetic rows to encode.")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per encoder.")
+        parser.add_argument(
+            "--from-db",
+            action="store_true",
+            help="Encode Facade.ViewSalesPerformance() instead of synthetic rows.",
+        )
+
+    def _synthetic(self, rows):
+        start = date(2024, 1, 1)
+        return {
+            "product_sales": [
+                {
+                    "DateOfSale": start + timedelta(days=i % 365),
+                    "StoreId__StoreName": f"Store {i % 50}",
+                    "ProductId__ProductName": f"Product {i % 5000}",
+                    "TotalSales": Decimal(random.randint(100, 10**7)) / 100,
+                }
+                for i in range(rows)
+            ]
+        }
+
+    def _time(self, fn, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            size = fn()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings), size
+
+    def handle(self, *args, **options):
+        data = Facade().ViewSalesPerformance() if options["from_db"] else self._synthetic(options["rows"])
+        repeat = options["repeat"]
+        rows = sum(len(v) for v in data.values())
+
+        def streamed():
+            records = [row for value in data.values() for row in value]
+            response = serializers.StreamingJsonArrayResponse(iter(records))
+            return sum(len(chunk) for chunk in response.streaming_content)
+
+        def encoded(response_data):
+            return len(serializers.FastJsonResponse(response_data).content)
+
+        cases = [("JsonResponse (current)", None, lambda: len(JsonResponse(data).content))]
+        encoders = ["django"] + (["orjson"] if serializers.orjson is not None else [])
+        for encoder in encoders:
+            cases.extend(
+                [
+                    (encoder, encoder, lambda: encoded(data)),
+                    (f"{encoder} columns", encoder, lambda: encoded(serializers.columnar(data))),
+                    (f"{encoder} streamed", encoder, streamed),
+                ]
+            )
+
+        self.stdout.write(f"Encoding {rows} rows, median of {repeat} runs\n")
+        self.stdout.write(f"{'encoder':<24} {'ms':>10} {'bytes':>12}")
+        baseline = None
+        for name, encoder, fn in cases:
+            with override_settings(JSON_SERIALIZER=encoder or "auto"):
+                ms, size = self._time(fn, repeat)
+            baseline = baseline or ms
+            self.stdout.write(f"{name:<24} {ms:>10.2f} {size:>12}  ({baseline / ms:.1f}x)")
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-19 17:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('Human_Resources', '0001_initial'),
+        ('Inventory_Control', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sales',
+            fields=[
+                ('SalesId', models.AutoField(primary_key=True, serialize=False, unique=True)),
+                ('PaymentMethod', models.CharField(max_length=200)),
+                ('TotalAmount', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('DateOfSale', models.DateField(auto_now_add=True)),
+                ('ProductId', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sales', to='Inventory_Control.product')),
+                ('StaffId', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sales', to='Human_Resources.staff')),
+                ('StoreId', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales', to='Inventory_Control.store')),
+            ],
+        ),
+    ]
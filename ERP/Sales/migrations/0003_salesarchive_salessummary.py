@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-19 17:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Human_Resources', '0001_initial'),
+        ('Inventory_Control', '0005_stocksnapshot_stockmovement'),
+        ('Sales', '0002_alter_sales_dateofsale'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesArchive',
+            fields=[
+                ('ArchiveId', models.AutoField(primary_key=True, serialize=False, unique=True)),
+                ('Month', models.DateField(db_index=True)),
+                ('RowCount', models.IntegerField()),
+                ('TotalAmount', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('Rows', models.BinaryField()),
+                ('ArchivedAt', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SalesSummary',
+            fields=[
+                ('SummaryId', models.AutoField(primary_key=True, serialize=False, unique=True)),
+                ('DateOfSale', models.DateField(db_index=True)),
+                ('TotalSales', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('SalesCount', models.IntegerField()),
+                ('ProductId', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sales_summaries', to='Inventory_Control.product')),
+                ('StaffId', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sales_summaries', to='Human_Resources.staff')),
+                ('StoreId', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_summaries', to='Inventory_Control.store')),
+            ],
+        ),
+    ]
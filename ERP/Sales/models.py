@@ -1,6 +1,8 @@
 from django.db import models
 from Inventory_Control.models import Store, Product
 from Human_Resources.models import Staff
+from ERP.profiling import traced
+from ERP.reference_cache import get_related
 
 
 class Sales(models.Model):
@@ -14,11 +16,12 @@ class Sales(models.Model):
     StaffId = models.ForeignKey(
         Staff, on_delete=models.SET_NULL, null=True, related_name="sales"
     )
-    DateOfSale = models.DateField(auto_now_add=True)
+    DateOfSale = models.DateField(auto_now_add=True, db_index=True)
 
     def __str__(self):
-        return f"Id: {self.SalesId} - Total: {self.TotalAmount} - Store: {self.StoreId.StoreName}"
+        return f"Id: {self.SalesId} - Total: {self.TotalAmount} - Store: {get_related(self, 'StoreId').StoreName}"
 
+    @traced()
     def GetSalesData(self):
         """
         Returns the sales record data as a dictionary.
@@ -27,48 +30,71 @@ class Sales(models.Model):
             "SalesId": self.SalesId,
             "PaymentMethod": self.PaymentMethod,
             "TotalAmount": self.TotalAmount,
-            "Store": self.StoreId.StoreName,
-            "Staff": self.StaffId.StaffName if self.StaffId else None,
+            "Store": get_related(self, "StoreId").StoreName,
+            "Staff": get_related(self, "StaffId").StaffName if self.StaffId_id else None,
             "DateOfSale": self.DateOfSale,
         }
 
+    @traced()
     def GetSalesGraph(self, start_date=None, end_date=None):
         """
         Generates sales data for a graph based on the given date range.
         start_date: Optional start date for filtering sales (datetime.date).
         end_date: Optional end date for filtering sales (datetime.date).
         """
-        from django.db.models import Sum
+        from Sales.partitions import sales_totals
 
-        sales_queryset = Sales.objects.all()
-
-        if start_date:
-            sales_queryset = sales_queryset.filter(DateOfSale__gte=start_date)
-        if end_date:
-            sales_queryset = sales_queryset.filter(DateOfSale__lte=end_date)
-
-        sales_summary = (
-            sales_queryset.values("DateOfSale")
-            .annotate(TotalSales=Sum("TotalAmount"))
-            .order_by("DateOfSale")
-        )
-
-        return list(sales_summary)  # Returns a list of dictionaries for graph plotting
+        # Archived months are read from their daily summaries
+        return sales_totals(["DateOfSale"], start_date, end_date)  # Returns a list of dictionaries for graph plotting
 
+    @traced()
     def CalculateTotalSales(self, start_date=None, end_date=None):
         """
         Calculates the total sales amount within the specified date range.
         start_date: Optional start date for filtering sales (datetime.date).
         end_date: Optional end date for filtering sales (datetime.date).
         """
-        from django.db.models import Sum
+        from Sales.partitions import total_sales
+
+        return total_sales(start_date, end_date)
+
 
-        sales_queryset = Sales.objects.all()
+class SalesArchive(models.Model):
+    """
+    Sales rows of a closed month moved out of the hot Sales table, stored as
+    zlib-compressed JSON lines. A month may be archived in more than one batch.
+    """
+
+    ArchiveId = models.AutoField(primary_key=True, unique=True)
+    Month = models.DateField(db_index=True)  # First day of the archived month.
+    RowCount = models.IntegerField()
+    TotalAmount = models.DecimalField(max_digits=15, decimal_places=2)
+    Rows = models.BinaryField()
+    ArchivedAt = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Archive {self.Month:%Y-%m} - Rows:{self.RowCount} - Total:{self.TotalAmount}"
 
-        if start_date:
-            sales_queryset = sales_queryset.filter(DateOfSale__gte=start_date)
-        if end_date:
-            sales_queryset = sales_queryset.filter(DateOfSale__lte=end_date)
 
-        total_sales = sales_queryset.aggregate(TotalSales=Sum("TotalAmount"))
-        return total_sales["TotalSales"] or 0
+class SalesSummary(models.Model):
+    """
+    Daily totals of archived sales per store, product and staff member. Reports read
+    these instead of the archived rows.
+    """
+
+    SummaryId = models.AutoField(primary_key=True, unique=True)
+    DateOfSale = models.DateField(db_index=True)
+    StoreId = models.ForeignKey(
+        Store, on_delete=models.CASCADE, related_name="sales_summaries"
+    )
+    ProductId = models.ForeignKey(
+        Product, on_delete=models.SET_NULL, related_name="sales_summaries", null=True
+    )
+    StaffId = models.ForeignKey(
+        Staff, on_delete=models.SET_NULL, null=True, related_name="sales_summaries"
+    )
+    TotalSales = models.DecimalField(max_digits=15, decimal_places=2)
+    SalesCount = models.IntegerField()
+
+    def __str__(self):
+        return f"{self.DateOfSale} - Store:{self.StoreId_id} - Total: {self.TotalSales}"
@@ -0,0 +1,279 @@
+import json
+import zlib
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+from django.utils import timezone
+
+from Sales.models import Sales, SalesArchive, SalesSummary
+
+
+# Column order of the JSON lines stored in SalesArchive.Rows.
+ARCHIVE_FIELDS = (
+    "SalesId",
+    "PaymentMethod",
+    "TotalAmount",
+    "StoreId",
+    "ProductId",
+    "StaffId",
+    "DateOfSale",
+)
+
+
+def _as_date(value):
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    return value
+
+
+def _month_bounds(month):
+    first = month.replace(day=1)
+    following = (first + timedelta(days=32)).replace(day=1)
+    return first, following
+
+
+def archive_horizon():
+    """
+    Returns the last day covered by the archive, or None if nothing is archived.
+    Sales on or before this day live in SalesSummary; later sales live in Sales.
+    """
+    month = SalesArchive.objects.aggregate(Top=Max("Month"))["Top"]
+    if month is None:
+        return None
+    return _month_bounds(month)[1] - timedelta(days=1)
+
+
+def _routed(start_date, end_date):
+    """
+    Returns (hot queryset, archive queryset) for the date range, with None for a
+    source the range does not overlap. Both bounds come from indexed MIN/MAX
+    lookups, so routing stays correct even after a month is restored.
+    """
+    start_date, end_date = _as_date(start_date), _as_date(end_date)
+    horizon = archive_horizon()
+    oldest_hot = Sales.objects.aggregate(Oldest=Min("DateOfSale"))["Oldest"]
+
+    hot = Sales.objects.all()
+    archive = SalesSummary.objects.all()
+    if start_date:
+        hot = hot.filter(DateOfSale__gte=start_date)
+        archive = archive.filter(DateOfSale__gte=start_date)
+    if end_date:
+        hot = hot.filter(DateOfSale__lte=end_date)
+        archive = archive.filter(DateOfSale__lte=end_date)
+
+    if horizon is None or (start_date and start_date > horizon):
+        archive = None
+    if oldest_hot is None or (end_date and end_date < oldest_hot):
+        hot = None
+    if hot is None and archive is None:
+        # Nothing overlaps; an empty hot query keeps the result shape.
+        hot = Sales.objects.none()
+    return hot, archive
+
+
+def _sort_key(order_by):
+    def key(row):
+        return tuple((row[field] is not None, row[field]) for field in order_by)
+
+    return key
+
+
+def sales_totals(group_by, start_date=None, end_date=None, order_by=None):
+    """
+    Returns total sales grouped by the given fields, reading only the hot table
+    and/or the archive summaries that overlap the date range.
+    group_by: Field names valid on both Sales and SalesSummary, e.g. "DateOfSale" or
+              "StoreId__StoreName".
+    start_date: Optional start date (datetime.date or YYYY-MM-DD string).
+    end_date: Optional end date (datetime.date or YYYY-MM-DD string).
+    order_by: Fields to sort the result by (defaults to group_by). The remaining
+              group_by fields break ties, so the order does not depend on which
+              sources were read.
+    return: A list of dictionaries with the group_by fields and "TotalSales".
+    """
+    order_by = list(order_by or group_by)
+    order_by += [field for field in group_by if field not in order_by]
+    hot, archive = _routed(start_date, end_date)
+
+    querysets = []
+    if hot is not None:
+        querysets.append(hot.values(*group_by).annotate(TotalSales=Sum("TotalAmount")))
+    if archive is not None:
+        querysets.append(archive.values(*group_by).annotate(TotalSales=Sum("TotalSales")))
+
+    if len(querysets) == 1:
+        return list(querysets[0].order_by(*order_by))
+
+    merged = {}
+    for queryset in querysets:
+        for row in queryset.order_by():
+            key = tuple(row[field] for field in group_by)
+            if key in merged:
+                merged[key]["TotalSales"] += row["TotalSales"] or 0
+            else:
+                merged[key] = row
+    return sorted(merged.values(), key=_sort_key(order_by))
+
+
+def total_sales(start_date=None, end_date=None):
+    """
+    Returns the total sales amount in the date range across hot and archived sales.
+    """
+    hot, archive = _routed(start_date, end_date)
+    total = 0
+    if hot is not None:
+        total += hot.aggregate(Total=Sum("TotalAmount"))["Total"] or 0
+    if archive is not None:
+        total += archive.aggregate(Total=Sum("TotalSales"))["Total"] or 0
+    return total
+
+
+def archive_month(month):
+    """
+    Moves every sale of a month from Sales into a compressed SalesArchive row,
+    writing daily SalesSummary totals for reports.
+    month: Any date within the month to archive.
+    return: The SalesArchive created, or None if the month had no sales.
+    """
+    first, following = _month_bounds(month)
+    rows = Sales.objects.filter(DateOfSale__gte=first, DateOfSale__lt=following)
+
+    with transaction.atomic():
+        compressor = zlib.compressobj(9)
+        parts = []
+        count = 0
+        total = Decimal(0)
+        for row in rows.order_by("SalesId").values_list(*ARCHIVE_FIELDS).iterator(
+            chunk_size=5000
+        ):
+            line = json.dumps(row, cls=DjangoJSONEncoder) + "\n"
+            parts.append(compressor.compress(line.encode()))
+            count += 1
+            total += row[2]
+
+        if not count:
+            return None
+        parts.append(compressor.flush())
+
+        SalesSummary.objects.bulk_create(
+            [
+                SalesSummary(
+                    DateOfSale=summary["DateOfSale"],
+                    StoreId_id=summary["StoreId"],
+                    ProductId_id=summary["ProductId"],
+                    StaffId_id=summary["StaffId"],
+                    TotalSales=summary["TotalSales"],
+                    SalesCount=summary["SalesCount"],
+                )
+                for summary in rows.values("DateOfSale", "StoreId", "ProductId", "StaffId")
+                .annotate(TotalSales=Sum("TotalAmount"), SalesCount=Count("SalesId"))
+                .order_by()
+            ],
+            batch_size=5000,
+        )
+        archive = SalesArchive.objects.create(
+            Month=first, RowCount=count, TotalAmount=total, Rows=b"".join(parts)
+        )
+        rows.delete()
+    return archive
+
+
+def archive_closed_months(keep_days=90, today=None):
+    """
+    Archives every month that ended more than keep_days ago.
+    return: The list of SalesArchive rows created.
+    """
+    cutoff = (today or timezone.localdate()) - timedelta(days=keep_days)
+    # A month is closed once it ends before the cutoff, i.e. it starts before the
+    # cutoff's month.
+    months = Sales.objects.filter(DateOfSale__lt=cutoff.replace(day=1)).dates(
+        "DateOfSale", "month"
+    )
+    return [archive for archive in map(archive_month, months) if archive is not None]
+
+
+def iter_archived_rows(archive):
+    """
+    Yields the archived sales of a SalesArchive as dictionaries.
+    """
+    decompressor = zlib.decompressobj()
+    pending = b""
+    data = bytes(archive.Rows)
+    for offset in range(0, len(data), 1 << 16):
+        pending += decompressor.decompress(data[offset : offset + (1 << 16)])
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield dict(zip(ARCHIVE_FIELDS, json.loads(line)))
+    pending += decompressor.flush()
+    if pending.strip():
+        yield dict(zip(ARCHIVE_FIELDS, json.loads(pending)))
+
+
+def iter_sales(start_date=None, end_date=None, chunk_size=5000):
+    """
+    Yields every sale in the date range as a dictionary of ARCHIVE_FIELDS, reading
+    archived months first and then the hot table, without loading either at once.
+    Archived rows carry TotalAmount and DateOfSale as strings, as stored.
+    """
+    start_date, end_date = _as_date(start_date), _as_date(end_date)
+    archives = SalesArchive.objects.order_by("Month")
+    if start_date:
+        archives = archives.filter(Month__gte=start_date.replace(day=1))
+    if end_date:
+        archives = archives.filter(Month__lte=end_date)
+    for archive_id in archives.values_list("ArchiveId", flat=True):
+        for row in iter_archived_rows(SalesArchive.objects.get(pk=archive_id)):
+            day = date.fromisoformat(row["DateOfSale"])
+            if (start_date is None or day >= start_date) and (end_date is None or day <= end_date):
+                yield row
+
+    hot = Sales.objects.order_by("SalesId")
+    if start_date:
+        hot = hot.filter(DateOfSale__gte=start_date)
+    if end_date:
+        hot = hot.filter(DateOfSale__lte=end_date)
+    yield from hot.values(*ARCHIVE_FIELDS).iterator(chunk_size=chunk_size)
+
+
+def restore_month(month):
+    """
+    Moves an archived month back into the hot Sales table.
+    return: Number of sales restored.
+    """
+    first, following = _month_bounds(month)
+    archives = SalesArchive.objects.filter(Month=first)
+
+    restored = 0
+    with transaction.atomic():
+        for archive in archives:
+            by_date = {}
+            objs = []
+            for row in iter_archived_rows(archive):
+                row["TotalAmount"] = Decimal(row["TotalAmount"])
+                row["DateOfSale"] = date.fromisoformat(row["DateOfSale"])
+                by_date.setdefault(row["DateOfSale"], []).append(row["SalesId"])
+                objs.append(
+                    Sales(
+                        SalesId=row["SalesId"],
+                        PaymentMethod=row["PaymentMethod"],
+                        TotalAmount=row["TotalAmount"],
+                        StoreId_id=row["StoreId"],
+                        ProductId_id=row["ProductId"],
+                        StaffId_id=row["StaffId"],
+                    )
+                )
+            Sales.objects.bulk_create(objs, batch_size=5000)
+            # DateOfSale is auto_now_add, so bulk_create stamped today's date.
+            for day, ids in by_date.items():
+                Sales.objects.filter(SalesId__in=ids).update(DateOfSale=day)
+            restored += len(objs)
+
+        SalesSummary.objects.filter(DateOfSale__gte=first, DateOfSale__lt=following).delete()
+        archives.delete()
+    return restored
@@ -1,3 +1,241 @@
-from django.test import TestCase
+import json
+import unittest
+from datetime import date, datetime, time, timezone as dt_timezone
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, override_settings
+
+from ERP import serializers
+from ERP.facade import Facade
+from ERP.identity_map import identity_map, resolve
+from ERP.testing import QueryCountTestCase
+from Finance.models import Department
+from Human_Resources.models import Staff
+from Inventory_Control.models import Product, Store
+from . import partitions
+from .models import Sales, SalesArchive, SalesSummary
+
+
+class SalesQueryCountTests(QueryCountTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(DepartmentName="Retail", Budget=1000)
+        cls.staff = Staff.objects.create(
+            StaffName="Alex", Role="Cashier", Salary=100, DepartmentId=department
+        )
+        cls.store = Store.objects.create(
+            StoreName="Central",
+            Location="High Street",
+            ContactNumber="0123",
+            TotalSales=0,
+            OperatingHours=8,
+        )
+        cls.product = Product.objects.create(
+            ProductName="Kettle", Category="Kitchen", Price=20, StockLevel=0, ReorderLevel=5
+        )
+        for _ in range(3):
+            Sales.objects.create(
+                PaymentMethod="Card",
+                TotalAmount=20,
+                StoreId=cls.store,
+                ProductId=cls.product,
+                StaffId=cls.staff,
+            )
+
+    def test_str_reuses_cached_store(self):
+        sales = list(Sales.objects.all())
+        with self.assertNumQueries(1):
+            for sale in sales:
+                str(sale)
+
+    def test_get_sales_data_without_identity_map(self):
+        sales = list(Sales.objects.all())
+        # Store comes from the reference cache; Staff is loaded once per sale.
+        with self.assertNumQueries(1 + len(sales)):
+            for sale in sales:
+                sale.GetSalesData()
+
+    def test_get_sales_data_with_identity_map(self):
+        sales = list(Sales.objects.all())
+        with identity_map(), self.assertNumQueries(2):
+            for sale in sales:
+                sale.GetSalesData()
+
+    def test_resolve_batches_foreign_keys(self):
+        sales = list(Sales.objects.all())
+        with self.assertNumQueries(3):
+            resolve(sales, "StoreId", "ProductId", "StaffId")
+        with self.assertNumQueries(0):
+            for sale in sales:
+                sale.GetSalesData()
+                str(sale)
+
+    def test_performance_view_formats(self):
+        rows = self.client.get("/sales/performance/").json()["store_sales"]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["StoreId__StoreName"], "Central")
+        # Decimals are sent as strings.
+        self.assertEqual(Decimal(rows[0]["TotalSales"]), 60)
+
+        columns = self.client.get("/sales/performance/?format=columns").json()["store_sales"]
+        self.assertEqual(columns["fields"], ["StoreId__StoreName", "TotalSales"])
+        self.assertEqual(columns["columns"], [["Central"], [rows[0]["TotalSales"]]])
+
+    def test_export_streams_all_sales(self):
+        self.assertEqual(self.client.get("/sales/export/").status_code, 302)
+
+        self.client.force_login(User.objects.create_user("manager", password="x", is_staff=True))
+        response = self.client.get("/sales/export/")
+        rows = json.loads(b"".join(response.streaming_content))
+        self.assertEqual([row["TotalAmount"] for row in rows], ["20.00"] * 3)
+
+
+class SalesPartitionTests(QueryCountTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(DepartmentName="Retail", Budget=1000)
+        cls.staff = Staff.objects.create(
+            StaffName="Alex", Role="Cashier", Salary=100, DepartmentId=department
+        )
+        cls.stores = [
+            Store.objects.create(
+                StoreName=name, Location="A", ContactNumber="1", TotalSales=0, OperatingHours=8
+            )
+            for name in ("East", "West")
+        ]
+        # Two products share a name, so product rows tie on ProductName.
+        cls.products = [
+            Product.objects.create(
+                ProductName=name, Category="C", Price=1, StockLevel=0, ReorderLevel=1
+            )
+            for name in ("Kettle", "Kettle", "Toaster")
+        ]
+        cls.days = [date(2024, 1, 5), date(2024, 1, 20), date(2024, 2, 3), date(2024, 3, 10)]
+        for i, day in enumerate(cls.days * 3):
+            sale = Sales.objects.create(
+                PaymentMethod="Card",
+                TotalAmount=Decimal(i + 1) + Decimal("0.25"),
+                StoreId=cls.stores[i % 2],
+                ProductId=cls.products[i % 3],
+                StaffId=cls.staff,
+            )
+            Sales.objects.filter(pk=sale.pk).update(DateOfSale=day)
+
+    def reports(self, start_date=None, end_date=None):
+        return (
+            Facade().ViewSalesPerformance(start_date, end_date),
+            Sales().GetSalesGraph(start_date, end_date),
+            Sales().CalculateTotalSales(start_date, end_date),
+        )
+
+    def sales(self):
+        return list(Sales.objects.order_by("SalesId").values(*partitions.ARCHIVE_FIELDS))
+
+    def test_reports_match_after_archiving(self):
+        ranges = [
+            (None, None),
+            (date(2024, 1, 10), None),
+            # Spans the archive horizon (end of February) into the hot table.
+            (date(2024, 1, 10), date(2024, 3, 31)),
+            (date(2024, 2, 1), date(2024, 2, 29)),
+            (date(2024, 3, 1), None),
+        ]
+        before = [self.reports(*bounds) for bounds in ranges]
+
+        self.assertIsNotNone(partitions.archive_month(date(2024, 1, 1)))
+        self.assertIsNotNone(partitions.archive_month(date(2024, 2, 1)))
+        self.assertEqual(partitions.archive_horizon(), date(2024, 2, 29))
+        self.assertEqual(Sales.objects.count(), 3)
+
+        for bounds, expected in zip(ranges, before):
+            self.assertEqual(self.reports(*bounds), expected, bounds)
+
+    def test_equal_product_names_are_ordered_by_store(self):
+        # March is hot and only sold in the West, so merging lists it before the
+        # archived East rows.
+        partitions.archive_month(date(2024, 1, 1))
+        partitions.archive_month(date(2024, 2, 1))
+        rows = Facade().ViewSalesPerformance()["product_sales"]
+        keys = [(row["ProductId__ProductName"], row["StoreId__StoreName"]) for row in rows]
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(keys[:2], [("Kettle", "East"), ("Kettle", "West")])
+
+    def test_restore_round_trip(self):
+        before = self.sales()
+        partitions.archive_month(date(2024, 1, 15))
+        self.assertEqual(partitions.restore_month(date(2024, 1, 1)), 6)
+
+        self.assertEqual(self.sales(), before)
+        self.assertFalse(SalesArchive.objects.exists())
+        self.assertFalse(SalesSummary.objects.exists())
+        self.assertIsNone(partitions.archive_horizon())
+
+    def test_iter_sales_reads_archive_then_hot_table(self):
+        before = self.sales()
+        partitions.archive_month(date(2024, 1, 1))
+
+        rows = list(partitions.iter_sales(date(2024, 1, 10), date(2024, 2, 29)))
+        # The archived January rows come first, then February from the hot table.
+        expected = [row for row in before if date(2024, 1, 10) <= row["DateOfSale"] <= date(2024, 1, 31)]
+        expected += [row for row in before if row["DateOfSale"].month == 2]
+        self.assertEqual(
+            [(row["SalesId"], Decimal(row["TotalAmount"]), str(row["DateOfSale"])) for row in rows],
+            [(row["SalesId"], row["TotalAmount"], str(row["DateOfSale"])) for row in expected],
+        )
+        self.assertEqual(len(list(partitions.iter_sales())), len(before))
+
+
+class SerializerTests(SimpleTestCase):
+    data = {
+        "rows": [
+            {
+                "Total": Decimal("1.50"),
+                "Day": date(2024, 2, 29),
+                "At": datetime(2024, 2, 29, 13, 5, 9, 123456, tzinfo=dt_timezone.utc),
+                "Local": datetime(2024, 2, 29, 13, 5, 9),
+                "Opens": time(8, 30, 0, 250000),
+            }
+        ],
+        "count": 1,
+    }
+
+    def test_django_encoder_output(self):
+        with override_settings(JSON_SERIALIZER="django"):
+            self.assertEqual(
+                serializers.dumps(self.data),
+                b'{"rows":[{"Total":"1.50","Day":"2024-02-29","At":"2024-02-29T13:05:09.123Z",'
+                b'"Local":"2024-02-29T13:05:09","Opens":"08:30:00.250"}],"count":1}',
+            )
+
+    @unittest.skipIf(serializers.orjson is None, "orjson is not installed")
+    def test_orjson_encoder_output(self):
+        with override_settings(JSON_SERIALIZER="orjson"):
+            self.assertEqual(
+                serializers.dumps(self.data),
+                b'{"rows":[{"Total":"1.50","Day":"2024-02-29","At":"2024-02-29T13:05:09.123456Z",'
+                b'"Local":"2024-02-29T13:05:09","Opens":"08:30:00.250000"}],"count":1}',
+            )
+
+    @unittest.skipIf(serializers.orjson is None, "orjson is not installed")
+    def test_orjson_matches_django_encoder_to_the_second(self):
+        data = {
+            "Day": date(2024, 2, 29),
+            "At": datetime(2024, 2, 29, 13, 5, 9, tzinfo=dt_timezone.utc),
+            "Local": datetime(2024, 2, 29, 13, 5, 9),
+            "Opens": time(8, 30),
+            "Total": Decimal("1.50"),
+        }
+        with override_settings(JSON_SERIALIZER="django"):
+            expected = serializers.dumps(data)
+        with override_settings(JSON_SERIALIZER="orjson"):
+            self.assertEqual(serializers.dumps(data), expected)
+
+    def test_streamed_array_batches(self):
+        items = [{"n": Decimal(i)} for i in range(5)]
+        response = serializers.StreamingJsonArrayResponse(iter(items), batch_size=2)
+        chunks = list(response.streaming_content)
+        self.assertEqual(len(chunks), 5)
+        self.assertEqual(json.loads(b"".join(chunks)), [{"n": str(i)} for i in range(5)])
+        empty = serializers.StreamingJsonArrayResponse(iter([]))
+        self.assertEqual(b"".join(empty.streaming_content), b"[]")
@@ -1,19 +1,50 @@
+from datetime import date
+
+from django.contrib.admin.views.decorators import staff_member_required
 from django.http import JsonResponse
 from django.shortcuts import render
 
 from ERP.facade import Facade
+from ERP.serializers import StreamingJsonArrayResponse, json_response
+from Sales.partitions import iter_sales
 
 
-def SalesPerformanceGraphView(request):
-    facade = Facade()
+def _date_range(request):
     start_date = request.GET.get("start_date")  # Optional date from query parameters
     end_date = request.GET.get("end_date")
+    return (
+        date.fromisoformat(start_date) if start_date else None,
+        date.fromisoformat(end_date) if end_date else None,
+    )
+
 
-    sales_data = facade.ViewSalesPerformanceGraph(start_date, end_date)
+def SalesPerformanceGraphView(request):
+    try:
+        start_date, end_date = _date_range(request)
+    except ValueError:
+        return JsonResponse({"error": "Dates must be YYYY-MM-DD."}, status=400)
 
-    return JsonResponse(
+    facade = Facade()
+    sales_data = facade.ViewSalesPerformance(start_date, end_date)
+
+    # ?format=columns returns each list as {"fields": [...], "columns": [...]}
+    return json_response(
+        request,
         {
             "store_sales": sales_data["store_sales"],
             "product_sales": sales_data["product_sales"],
-        }
+        },
     )
+
+
+@staff_member_required
+def SalesExportView(request):
+    """
+    Streams every sale in the optional date range as a JSON array.
+    """
+    try:
+        start_date, end_date = _date_range(request)
+    except ValueError:
+        return JsonResponse({"error": "Dates must be YYYY-MM-DD."}, status=400)
+
+    return StreamingJsonArrayResponse(iter_sales(start_date, end_date))